@@ -1,11 +1,23 @@
-"""Authentication module with JWT tokens"""
-
+"""Authentication module with JWT tokens
+
+Note: `get_current_user` and `get_optional_user` must stay `async def` so
+FastAPI resolves them inline on the event loop instead of wrapping them with
+`run_in_threadpool` (which costs a threadpool hop per request).
+"""
+
+import base64
+import hashlib
+import hmac
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Annotated, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 import jwt
+import jwt.api_jwt
+import orjson
 
 from app.config import settings
 
@@ -13,8 +25,83 @@ from app.config import settings
 # JWT settings
 ALGORITHM = "HS256"
 
+# Prepare the HMAC key once - PyJWT's prepare_key re-runs force_bytes plus
+# PEM/SSH-format sniffing on the secret for every encode/decode otherwise.
+_SIGNING_KEY = jwt.algorithms.HMACAlgorithm(
+    jwt.algorithms.HMACAlgorithm.SHA256
+).prepare_key(settings.jwt_secret)
+
+class _OrjsonPyJWT(jwt.api_jwt.PyJWT):
+    """PyJWT with the payload codec swapped to orjson (Rust JSON, much
+    faster than stdlib json). Uses PyJWT's documented subclass hooks."""
+
+    def _encode_payload(self, payload, headers=None, json_encoder=None) -> bytes:
+        return orjson.dumps(payload)
+
+    def _decode_payload(self, decoded):
+        try:
+            payload = orjson.loads(decoded["payload"])
+        except orjson.JSONDecodeError as e:
+            raise jwt.exceptions.DecodeError(f"Invalid payload string: {e}") from e
+        if not isinstance(payload, dict):
+            raise jwt.exceptions.DecodeError("Invalid payload string: must be a json object")
+        return payload
+
+
+_jwt_codec = _OrjsonPyJWT()
+
+
+# HMAC object with the inner/outer pad setup already done; .copy() per verify
+# is much cheaper than hmac.new() re-deriving the key schedule each time
+_HMAC_TEMPLATE = hmac.new(_SIGNING_KEY, digestmod=hashlib.sha256)
+
+
+def _b64url_decode(data: bytes) -> bytes:
+    """Base64url-decode with padding restored"""
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+def _signature_valid(signing_input: bytes, signature: bytes) -> bool:
+    """Constant-time HS256 signature check using the cached HMAC template"""
+    digest = _HMAC_TEMPLATE.copy()
+    digest.update(signing_input)
+    return hmac.compare_digest(digest.digest(), signature)
+
+
+def _fast_verify(token: str) -> Optional[tuple[str, float]]:
+    """Handwritten HS256 verify: one split, one HMAC, one orjson parse.
+
+    Replaces PyJWT's per-call option/claims machinery on the verify path;
+    the crypto itself stays in OpenSSL via hashlib. Returns (username, exp)
+    on success, None on any failure.
+    """
+    try:
+        header_b64, payload_b64, sig_b64 = token.encode().split(b".", 2)
+        signing_input = header_b64 + b"." + payload_b64
+        if not _signature_valid(signing_input, _b64url_decode(sig_b64)):
+            return None
+        payload = orjson.loads(_b64url_decode(payload_b64))
+        exp = float(payload["exp"])
+        if exp <= time.time():
+            return None
+        username = payload["sub"]
+        if not isinstance(username, str):
+            return None
+        return username, exp
+    except Exception:
+        return None
+
+
 security = HTTPBearer(auto_error=False)
 
+# Cache for verified tokens (avoid re-running HMAC verify on every request).
+# Maps sha256(token) -> (username, cached_until). Entries live at most
+# _TOKEN_CACHE_TTL seconds and never past the token's own expiry.
+_TOKEN_CACHE_TTL = 5
+_TOKEN_CACHE_MAX = 10_000
+_token_cache: dict[bytes, tuple[str, float]] = {}
+_token_cache_lock = threading.Lock()
+
 
 class LoginRequest(BaseModel):
     username: str
@@ -31,40 +118,68 @@ class UserInfo(BaseModel):
     username: str
 
 
+# Token lifetime is fixed at import time; precompute it once
+_EXPIRES_DELTA = timedelta(hours=settings.jwt_expire_hours)
+_EXPIRES_IN_SECONDS = int(_EXPIRES_DELTA.total_seconds())
+
+
 def create_access_token(username: str) -> tuple[str, int]:
     """Create JWT access token"""
-    expires_delta = timedelta(hours=settings.jwt_expire_hours)
-    expire = datetime.utcnow() + expires_delta
-    
+    now = datetime.utcnow()
+
     to_encode = {
         "sub": username,
-        "exp": expire,
-        "iat": datetime.utcnow()
+        "exp": now + _EXPIRES_DELTA,
+        "iat": now
     }
-    
-    encoded_jwt = jwt.encode(to_encode, settings.jwt_secret, algorithm=ALGORITHM)
-    expires_in = int(expires_delta.total_seconds())
-    
-    return encoded_jwt, expires_in
+
+    encoded_jwt = _jwt_codec.encode(to_encode, _SIGNING_KEY, algorithm=ALGORITHM)
+
+    return encoded_jwt, _EXPIRES_IN_SECONDS
 
 
 def verify_token(token: str) -> Optional[str]:
-    """Verify JWT token and return username"""
-    try:
-        payload = jwt.decode(token, settings.jwt_secret, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            return None
-        return username
-    except jwt.ExpiredSignatureError:
-        return None
-    except jwt.InvalidTokenError:
+    """Verify JWT token and return username (cached for repeated requests)"""
+    key = hashlib.sha256(token.encode()).digest()
+    now = time.time()
+
+    with _token_cache_lock:
+        entry = _token_cache.get(key)
+        if entry is not None:
+            username, cached_until = entry
+            if cached_until > now:
+                return username
+            del _token_cache[key]
+
+    verified = _fast_verify(token)
+    if verified is None:
         return None
+    username, exp = verified
+
+    # Cache only successful verifications so bad tokens are always re-checked
+    cached_until = min(exp, now + _TOKEN_CACHE_TTL)
+    with _token_cache_lock:
+        if len(_token_cache) >= _TOKEN_CACHE_MAX:
+            _token_cache.clear()
+        _token_cache[key] = (username, cached_until)
+
+    return username
+
+
+async def _verify_cached(token: str) -> Optional[str]:
+    """Async wrapper over the cached verify, kept non-blocking for dependencies"""
+    # verify_token is a cache lookup on the hot path; no threadpool dispatch needed
+    return verify_token(token)
+
+
+# Expected credentials as a single blob for one constant-time compare
+_EXPECTED_CREDENTIALS = f"{settings.auth_username}\x00{settings.auth_password}".encode()
 
 
 def authenticate_user(username: str, password: str) -> bool:
-    """Check if username and password are correct"""
-    return username == settings.auth_username and password == settings.auth_password
+    """Check if username and password are correct (constant-time)"""
+    candidate = f"{username}\x00{password}".encode()
+    return hmac.compare_digest(candidate, _EXPECTED_CREDENTIALS)
 
 
 async def get_current_user(
@@ -78,7 +193,7 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    username = verify_token(credentials.credentials)
+    username = await _verify_cached(credentials.credentials)
     if username is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -95,4 +210,11 @@ async def get_optional_user(
     """Dependency that returns None if not authenticated (for WebSocket)"""
     if credentials is None:
         return None
-    return verify_token(credentials.credentials)
+    return await _verify_cached(credentials.credentials)
+
+
+# Shared dependency aliases - every route reusing the same Depends() instance
+# gives them an identical cache_key, so FastAPI resolves the dependency once
+# per request instead of once per route parameter.
+CurrentUser = Annotated[str, Depends(get_current_user)]
+OptionalUser = Annotated[Optional[str], Depends(get_optional_user)]
@@ -1,8 +1,10 @@
+import functools
 import os
 from pathlib import Path
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+@functools.lru_cache(maxsize=1)
 def get_data_dir() -> Path:
     """Get data directory path"""
     if os.environ.get('PZ_DATA_DIR'):
@@ -18,6 +20,7 @@ def get_database_url() -> str:
     return f"sqlite+aiosqlite:///{data_dir / 'pz_webadmin.db'}"
 
 
+@functools.lru_cache(maxsize=1)
 def get_or_create_encryption_key() -> str:
     """Get encryption key from env or generate and save new one"""
     # First check environment variable
@@ -39,6 +42,7 @@ def get_or_create_encryption_key() -> str:
     return key
 
 
+@functools.lru_cache(maxsize=1)
 def get_or_create_jwt_secret() -> str:
     """Get JWT secret from env or generate and save new one"""
     # First check environment variable
@@ -83,9 +87,18 @@ class Settings(BaseSettings):
     rcon_timeout: int = 10
     rcon_reconnect_delay: int = 5
     
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        frozen=True,
+        extra="ignore"
+    )
 
 
-settings = Settings()
+@functools.lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Build Settings once - pydantic validation and .env reads are not free"""
+    return Settings()
+
+
+settings = get_settings()
@@ -1,3 +1,5 @@
+import functools
+
 from cryptography.fernet import Fernet
 from app.config import settings
 
@@ -13,20 +15,41 @@ class CryptoService:
             )
         self.cipher = Fernet(settings.encryption_key.encode())
     
+    def encrypt_bytes(self, data: bytes) -> bytes:
+        """Encrypt raw bytes (no str round-trip)"""
+        return self.cipher.encrypt(data)
+
+    def decrypt_bytes(self, encrypted_data: bytes) -> bytes:
+        """Decrypt raw bytes (no str round-trip)"""
+        return self.cipher.decrypt(encrypted_data)
+
+    def encrypt_many(self, items: list[str]) -> list[str]:
+        """Encrypt a batch of strings (bulk paths like credential migration)"""
+        encrypt = self.cipher.encrypt
+        return ["" if not item else encrypt(item.encode()).decode('ascii')
+                for item in items]
+
+    def decrypt_many(self, items: list[str]) -> list[str]:
+        """Decrypt a batch of strings"""
+        decrypt = self.cipher.decrypt
+        return ["" if not item else decrypt(item.encode('ascii')).decode()
+                for item in items]
+
     def encrypt(self, data: str) -> str:
         """Encrypt string data"""
         if not data:
             return ""
-        encrypted = self.cipher.encrypt(data.encode())
-        return encrypted.decode()
-    
+        # Fernet output is base64, so the cheaper ASCII codec is enough
+        return self.cipher.encrypt(data.encode()).decode('ascii')
+
     def decrypt(self, encrypted_data: str) -> str:
         """Decrypt string data"""
         if not encrypted_data:
             return ""
-        decrypted = self.cipher.decrypt(encrypted_data.encode())
-        return decrypted.decode()
+        return self.cipher.decrypt(encrypted_data.encode('ascii')).decode()
 
 
-# Global instance
-crypto_service = CryptoService()
+@functools.lru_cache(maxsize=1)
+def get_crypto_service() -> CryptoService:
+    """Lazy singleton - defers encryption-key resolution until first use"""
+    return CryptoService()
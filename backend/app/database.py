@@ -1,17 +1,39 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import text
+from sqlalchemy import event, text
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import settings
 from app.models import Base
 
 
-# Create async engine
+# Create async engine - a single pooled connection (pool_size=1, no
+# overflow) keeps the local SQLite file on one long-lived connection and
+# serializes writers by *blocking* concurrent checkouts. StaticPool is
+# deliberately not used here: it hands the same live connection to every
+# checkout at once, so concurrent sessions would share one transaction and
+# a rollback in one request could discard another request's committed work.
 engine = create_async_engine(
     settings.database_url,
     echo=False,
-    future=True
+    future=True,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=1,
+    max_overflow=0,
+    connect_args={"timeout": 30}
 )
 
+
+@event.listens_for(engine.sync_engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune SQLite for concurrent web usage (WAL, fewer fsyncs, mmap reads)"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA cache_size=-64000")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
     engine,
@@ -23,19 +45,60 @@ AsyncSessionLocal = async_sessionmaker(
 async def run_migrations(conn):
     """Run database migrations for new columns"""
     # Migration: add auto_sync_mods column to servers table
-    try:
+    result = await conn.execute(text("PRAGMA table_info(servers)"))
+    columns = {row[1] for row in result.fetchall()}
+    if "auto_sync_mods" not in columns:
         await conn.execute(text("ALTER TABLE servers ADD COLUMN auto_sync_mods BOOLEAN DEFAULT 0"))
-    except Exception:
-        # Column already exists
-        pass
+
+    # Migration: mod_ids/enabled_mod_ids moved from "a;b;c" strings to JSON
+    # arrays. Rewrite legacy rows in place (JSON values always start with '[')
+    import json
+    result = await conn.execute(text("SELECT id, mod_ids, enabled_mod_ids FROM server_mods"))
+    for row_id, mod_ids, enabled_mod_ids in result.fetchall():
+        if isinstance(mod_ids, str) and not mod_ids.startswith('['):
+            await conn.execute(
+                text("UPDATE server_mods SET mod_ids = :m, enabled_mod_ids = :e WHERE id = :id"),
+                {
+                    "m": json.dumps([x for x in mod_ids.split(';') if x]),
+                    "e": json.dumps([x for x in (enabled_mod_ids or '').split(';') if x]),
+                    "id": row_id
+                }
+            )
+
+    # Migration: unique composite index on (server_id, workshop_id). Remove
+    # any legacy duplicate pairs first (keep the oldest row) so the index
+    # can be created on databases written before the key was enforced.
+    await conn.execute(text(
+        "DELETE FROM server_mods WHERE id NOT IN ("
+        "SELECT MIN(id) FROM server_mods GROUP BY server_id, workshop_id)"
+    ))
+    await conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_server_mods_server_workshop "
+        "ON server_mods (server_id, workshop_id)"
+    ))
+
+
+# Bump whenever tables or migrations change so init_db re-runs the DDL
+CURRENT_SCHEMA_VERSION = 3
 
 
 async def init_db():
-    """Initialize database - create all tables"""
+    """Initialize database - create all tables (skipped on warm databases)"""
     async with engine.begin() as conn:
+        version = (await conn.execute(text("PRAGMA user_version"))).scalar()
+        if version == CURRENT_SCHEMA_VERSION:
+            return
+
         await conn.run_sync(Base.metadata.create_all)
         # Run migrations for existing databases
         await run_migrations(conn)
+        await conn.execute(text(f"PRAGMA user_version = {CURRENT_SCHEMA_VERSION}"))
+
+
+async def get_db_ro() -> AsyncSession:
+    """Dependency for read-only endpoints - no commit, so no write transaction"""
+    async with AsyncSessionLocal() as session:
+        yield session
 
 
 async def get_db() -> AsyncSession:
@@ -47,5 +110,3 @@ async def get_db() -> AsyncSession:
         except Exception:
             await session.rollback()
             raise
-        finally:
-            await session.close()
@@ -1,18 +1,23 @@
 from fastapi import FastAPI, Depends, HTTPException, status, WebSocket, WebSocketDisconnect, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, Response
+from fastapi.responses import FileResponse, ORJSONResponse, Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from typing import List, Dict, Set, Optional
 import json
+import os
 import re
 import httpx
 import asyncio
+import orjson
+import time
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
 
-from app.database import get_db, init_db
+from app.database import AsyncSessionLocal, engine, get_db, get_db_ro, init_db
 from app.models import Server, CommandLog, ServerState, ServerMod
 from app.schemas import (
     ServerCreate,
@@ -29,23 +34,38 @@ from app.schemas import (
     ModParseResponse,
     ModsExport
 )
-from app.crypto import crypto_service
+from app.crypto import get_crypto_service
 from app.rcon_client import rcon_manager, RCONError
 from app.config import settings
 from app.auth import (
+    CurrentUser,
     LoginRequest,
     TokenResponse,
     authenticate_user,
     create_access_token,
-    get_current_user,
     verify_token
 )
 
 
+# Precompiled patterns for hot parsing paths
+_RE_WORKSHOP_ID = re.compile(r'id=(\d+)')
+_RE_MOD_ID = re.compile(r'Mod\s*ID[:\s]+([A-Za-z0-9_-]+)', re.IGNORECASE)
+_RE_REQUIRED_SECTION = re.compile(r'\[h1\]Required[^[]*\[/h1\](.*?)(?:\[h1\]|\Z)', re.IGNORECASE | re.DOTALL)
+_RE_DEPENDENCY_ID = re.compile(r'\[url=[^]]*\?id=(\d+)[^]]*\]')
+_RE_PLAYERS_CONNECTED = re.compile(r'Players connected \((\d+)\)')
+_RE_STEAM_NAME = re.compile(r'<div class="workshopItemTitle">([^<]+)</div>')
+_RE_STEAM_MODID_BOLD = re.compile(r'Mod\s*ID:\s*<b>([A-Za-z0-9_-]+)</b>', re.IGNORECASE)
+_RE_STEAM_MODID = re.compile(r'Mod\s*ID:\s*([A-Za-z0-9_-]+)', re.IGNORECASE)
+_RE_MODS_OPTION = re.compile(r'^\s*\*?\s*(Mods|WorkshopItems)\s*=\s*"?([^"\r\n]*)"?\s*$', re.MULTILINE)
+_RE_FILENAME_SAFE = re.compile(r'[^a-zA-Z0-9а-яА-ЯіІїЇєЄ._-]')
+_RE_SERVER_NAME_SAFE = re.compile(r'[^a-zA-Z0-9а-яА-ЯіІїЇєЄ_-]')
+
+
 app = FastAPI(
     title="PZ WebAdmin API",
     description="Backend API for Project Zomboid Server Management",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=ORJSONResponse
 )
 
 
@@ -54,7 +74,7 @@ def server_to_response(server: Server) -> dict:
     username = None
     if server.username:
         try:
-            username = crypto_service.decrypt(server.username)
+            username = get_crypto_service().decrypt(server.username)
         except:
             username = "admin"  # Fallback if decryption fails
     
@@ -71,15 +91,13 @@ def server_to_response(server: Server) -> dict:
     }
 
 
-# CORS configuration
+# CORS configuration - a regex allow-list instead of "*". Wildcard origins
+# with allow_credentials=True are invalid per spec (Starlette falls back to
+# echoing the Origin header on every request); the compiled regex keeps the
+# localhost dev setup working on any port.
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3000",
-        "http://127.0.0.1:3000",
-        "http://localhost:8000",
-        "*"
-    ],
+    allow_origin_regex=r"^https?://(localhost|127\.0\.0\.1)(:\d+)?$",
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -88,53 +106,116 @@ app.add_middleware(
 
 # ============= WebSocket Manager =============
 
+def _ws_encode(message: dict) -> str:
+    """Encode a WebSocket message with orjson (renders datetimes natively)"""
+    return orjson.dumps(message, option=orjson.OPT_UTC_Z | orjson.OPT_NAIVE_UTC).decode()
+
+
 class ConnectionManager:
     """Manages WebSocket connections for real-time updates"""
     
+    # Per-connection outbound buffer; clients further behind than this get dropped
+    OUTBOUND_QUEUE_SIZE = 256
+
     def __init__(self):
-        # Map server_id -> set of websockets
-        self.active_connections: Dict[int, Set[WebSocket]] = {}
+        # Map server_id -> list of websockets. A list iterates faster than a
+        # set in the broadcast hot loop; removal is O(1) via swap-with-last
+        # since subscriber order carries no meaning.
+        self.active_connections: Dict[int, List[WebSocket]] = {}
         self._broadcast_task: asyncio.Task | None = None
-    
+        # Per-websocket outbound queue and its writer task
+        self._queues: Dict[WebSocket, asyncio.Queue] = {}
+        self._writers: Dict[WebSocket, asyncio.Task] = {}
+
     async def connect(self, websocket: WebSocket, server_id: int):
         await websocket.accept()
-        if server_id not in self.active_connections:
-            self.active_connections[server_id] = set()
-        self.active_connections[server_id].add(websocket)
-    
+        self.active_connections.setdefault(server_id, []).append(websocket)
+        queue = asyncio.Queue(maxsize=self.OUTBOUND_QUEUE_SIZE)
+        self._queues[websocket] = queue
+        self._writers[websocket] = asyncio.create_task(self._writer_loop(websocket, queue))
+
     def disconnect(self, websocket: WebSocket, server_id: int):
-        if server_id in self.active_connections:
-            self.active_connections[server_id].discard(websocket)
-            if not self.active_connections[server_id]:
+        connections = self.active_connections.get(server_id)
+        if connections is not None:
+            try:
+                idx = connections.index(websocket)
+            except ValueError:
+                pass
+            else:
+                # Swap-remove: O(1) instead of shifting the tail
+                connections[idx] = connections[-1]
+                connections.pop()
+            if not connections:
                 del self.active_connections[server_id]
+        self._queues.pop(websocket, None)
+        writer = self._writers.pop(websocket, None)
+        if writer is not None:
+            writer.cancel()
+
+    async def _writer_loop(self, websocket: WebSocket, queue: asyncio.Queue):
+        """Drain one connection's outbound queue onto its socket.
+
+        A dedicated writer per connection decouples broadcasters from slow
+        TCP sinks: producers only enqueue and never await a send.
+        """
+        try:
+            while True:
+                payload = await queue.get()
+                await websocket.send_text(payload)
+        except (asyncio.CancelledError, Exception):
+            # Connection cleanup happens in the endpoint's disconnect path
+            pass
     
     async def broadcast_to_server(self, server_id: int, message: dict):
         """Send message to all clients subscribed to a server"""
-        if server_id not in self.active_connections:
+        connections = self.active_connections.get(server_id)
+        if not connections:
             return
-        
-        dead_connections = set()
-        for connection in self.active_connections[server_id]:
+
+        # Serialize once, then enqueue per client; the per-connection writer
+        # tasks do the actual sends so no producer ever awaits a slow socket
+        payload = _ws_encode(message)
+        # Snapshot so disconnects during iteration can't skip entries
+        for connection in connections[:]:
+            queue = self._queues.get(connection)
+            if queue is None:
+                continue
             try:
-                await connection.send_json(message)
-            except:
-                dead_connections.add(connection)
-        
-        # Clean up dead connections
-        for conn in dead_connections:
-            self.active_connections[server_id].discard(conn)
-    
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                # Client is too far behind - drop it instead of buffering
+                # unboundedly, and close the socket so the peer sees the
+                # eviction rather than a silently dead connection
+                self.disconnect(connection, server_id)
+                asyncio.create_task(self._close_evicted(connection))
+    
+    @staticmethod
+    async def _close_evicted(websocket: WebSocket) -> None:
+        """Close a kicked websocket; 1013 tells the client to retry later"""
+        try:
+            await websocket.close(code=1013)
+        except Exception:
+            pass
+
     async def broadcast_connection_status(self, server_id: int, connected: bool):
-        """Broadcast connection status change"""
+        """Broadcast connection status change
+
+        The timestamp is taken once here and rendered once during the single
+        _ws_encode pass, so every subscriber shares the same serialized value.
+        """
         await self.broadcast_to_server(server_id, {
             "type": "connection_status",
             "server_id": server_id,
             "connected": connected,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": datetime.utcnow()
         })
     
+    def has_subscribers(self, server_id: int) -> bool:
+        """Cheap guard so callers can skip building messages nobody will see"""
+        return bool(self.active_connections.get(server_id))
+
     def get_connected_clients_count(self, server_id: int) -> int:
-        return len(self.active_connections.get(server_id, set()))
+        return len(self.active_connections.get(server_id, ()))
 
 
 ws_manager = ConnectionManager()
@@ -144,7 +225,6 @@ ws_manager = ConnectionManager()
 # Support both development and PyInstaller exe paths
 def get_static_dir() -> Path:
     """Get static files directory, works for dev and PyInstaller"""
-    import os
     if os.environ.get('PZ_STATIC_DIR'):
         return Path(os.environ['PZ_STATIC_DIR'])
     return Path(__file__).parent.parent / "static"
@@ -154,22 +234,110 @@ if STATIC_DIR.exists() and (STATIC_DIR / "assets").exists():
     app.mount("/assets", StaticFiles(directory=STATIC_DIR / "assets"), name="assets")
 
 
+# Shared HTTP client for Steam API/Workshop traffic - keep-alive and HTTP/2
+# amortize the TCP+TLS handshake across requests instead of paying it per call
+_steam_client: httpx.AsyncClient | None = None
+
+
+def get_steam_client() -> httpx.AsyncClient:
+    global _steam_client
+    if _steam_client is None:
+        _steam_client = httpx.AsyncClient(
+            http2=True,
+            timeout=15.0,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            follow_redirects=True
+        )
+    return _steam_client
+
+
+# Buffered command-log writes: the execute endpoint only enqueues; a
+# background task flushes batches so no DB commit sits on the response path
+_LOG_FLUSH_BATCH = 100
+_LOG_FLUSH_INTERVAL = 0.2
+_log_queue: asyncio.Queue = asyncio.Queue(maxsize=10000)
+_log_flusher_task: asyncio.Task | None = None
+
+
+def enqueue_command_log(entry: dict) -> None:
+    """Queue a command log row for the background flusher (drops when full)"""
+    # Multi-row insert().values() needs identical keys on every row
+    row = {
+        "server_id": entry["server_id"],
+        "command": entry["command"],
+        "response": entry.get("response"),
+        "success": entry.get("success", True),
+        "error_message": entry.get("error_message"),
+        "executed_at": entry.get("executed_at") or datetime.utcnow()
+    }
+    try:
+        _log_queue.put_nowait(row)
+    except asyncio.QueueFull:
+        print("Command log queue full, dropping entry")
+
+
+async def _flush_log_batch(batch: list[dict]) -> None:
+    try:
+        async with AsyncSessionLocal() as session:
+            await session.execute(insert(CommandLog).values(batch))
+            await session.commit()
+    except Exception as e:
+        print(f"Error flushing command logs: {e}")
+
+
+async def _log_flusher():
+    """Accumulate command logs and write them in single batched inserts"""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await _log_queue.get()]
+        deadline = loop.time() + _LOG_FLUSH_INTERVAL
+        while len(batch) < _LOG_FLUSH_BATCH:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(_log_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        await _flush_log_batch(batch)
+
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize database on startup"""
     await init_db()
+    # Surface pool configuration so misconfiguration is visible in logs
+    print(f"Database pool: {engine.pool.status()}")
+    global _log_flusher_task
+    _log_flusher_task = asyncio.create_task(_log_flusher())
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
     rcon_manager.disconnect_all()
+    global _steam_client
+    if _steam_client is not None:
+        await _steam_client.aclose()
+        _steam_client = None
+    if _log_flusher_task is not None:
+        _log_flusher_task.cancel()
+    # Flush whatever is still queued so logs are not lost on shutdown
+    remaining = []
+    while not _log_queue.empty():
+        remaining.append(_log_queue.get_nowait())
+    if remaining:
+        await _flush_log_batch(remaining)
+
+
+# Health check - moved to /api/health (no auth required).
+# The body never changes, so encode it once and skip JSON work per probe
+# (load balancers hit this endpoint constantly).
+_HEALTH_BYTES = orjson.dumps({"status": "ok", "service": "PZ WebAdmin API"})
 
-
-# Health check - moved to /api/health (no auth required)
 @app.get("/api/health")
 async def health_check():
-    return {"status": "ok", "service": "PZ WebAdmin API"}
+    return Response(content=_HEALTH_BYTES, media_type="application/json")
 
 
 # ============= File Export =============
@@ -183,32 +351,29 @@ class ExportFileRequest(PydanticBaseModel):
 @app.post("/api/export-file")
 async def export_file(
     request: ExportFileRequest,
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser
 ):
     """Save export file to exports folder"""
-    import os
-    
     # Get exports directory (next to data folder)
     data_dir = Path(os.environ.get('PZ_DATA_DIR', '/data'))
     exports_dir = data_dir.parent / 'exports' if os.environ.get('PZ_DATA_DIR') else Path('/data/exports')
-    exports_dir.mkdir(parents=True, exist_ok=True)
-    
+    await asyncio.to_thread(exports_dir.mkdir, parents=True, exist_ok=True)
+
     # Sanitize filename
-    safe_filename = re.sub(r'[^a-zA-Z0-9а-яА-ЯіІїЇєЄ._-]', '_', request.filename)
+    safe_filename = _RE_FILENAME_SAFE.sub('_', request.filename)
     filepath = exports_dir / safe_filename
-    
-    # Write file
-    filepath.write_text(request.content, encoding='utf-8')
+
+    # Write file off the event loop - disk I/O can stall for milliseconds
+    await asyncio.to_thread(filepath.write_text, request.content, encoding='utf-8')
     
     return {"success": True, "path": str(filepath), "directory": str(exports_dir)}
 
 
 @app.post("/api/open-exports-folder")
 async def open_exports_folder(
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser
 ):
     """Open exports folder in system file explorer (Windows only)"""
-    import os
     import subprocess
     import sys
     
@@ -249,57 +414,119 @@ async def login(request: LoginRequest):
 
 
 @app.get("/api/auth/verify")
-async def verify_auth(current_user: str = Depends(get_current_user)):
+async def verify_auth(current_user: CurrentUser):
     """Verify current token is valid"""
     return {"valid": True, "username": current_user}
 
 
 # ============= WebSocket Endpoint =============
 
-# Cache for MaxPlayers per server (to avoid frequent showoptions calls)
-_max_players_cache: Dict[int, int] = {}
+# Cache for parsed showoptions output per server. One RCON round-trip plus
+# one parse serves both get_max_players and the /options endpoint within the
+# TTL window. TTL-bounded so server-side changes are picked up eventually,
+# LRU-bounded so the map cannot grow without limit.
+_OPTIONS_TTL = 300
+_OPTIONS_CACHE_MAX = 1024
+_options_cache: "OrderedDict[int, tuple[dict, str, float]]" = OrderedDict()
+
+
+def _parse_showoptions(response: str) -> dict:
+    """Parse showoptions key=value output into a flat dict"""
+    options = {}
+    for line in response.split('\n'):
+        line = line.strip()
+        # partition stops at the first '=' (values may contain '=') and
+        # folds the membership test and the split into one scan
+        key, sep, value = line.partition('=')
+        if sep:
+            key = key.strip()
+            # Remove leading "* " from keys (PZ format)
+            if key.startswith('* '):
+                key = key[2:]
+            options[key] = value.strip()
+    return options
+
+
+async def _load_options(server_id: int) -> tuple[dict, str]:
+    """Run showoptions once and cache the parsed (options, raw) result"""
+    entry = _options_cache.get(server_id)
+    if entry is not None:
+        options, raw, expires_at = entry
+        if expires_at > time.monotonic():
+            _options_cache.move_to_end(server_id)
+            return options, raw
+        del _options_cache[server_id]
+
+    raw = await rcon_manager.execute_command(server_id, "showoptions") or ""
+    options = _parse_showoptions(raw)
+    _options_cache[server_id] = (options, raw, time.monotonic() + _OPTIONS_TTL)
+    while len(_options_cache) > _OPTIONS_CACHE_MAX:
+        _options_cache.popitem(last=False)
+    return options, raw
+
 
 async def get_max_players(server_id: int) -> int:
-    """Get max players from showoptions (cached)"""
-    if server_id in _max_players_cache:
-        return _max_players_cache[server_id]
-    
+    """Get max players from showoptions (cached with TTL)"""
     try:
         if not rcon_manager.is_connected(server_id):
             return 0
-        
-        response = rcon_manager.execute_command(server_id, "showoptions")
-        if response:
-            import re
-            match = re.search(r'\*\s*MaxPlayers\s*=\s*(\d+)', response)
-            if match:
-                max_players = int(match.group(1))
-                _max_players_cache[server_id] = max_players
-                return max_players
+        options, _ = await _load_options(server_id)
+        return int(options.get('MaxPlayers', 0))
     except Exception as e:
         print(f"Error getting max players: {e}")
-    
-    return 0
+        return 0
+
+def clear_options_cache(server_id: int):
+    """Drop cached showoptions when server settings may have changed"""
+    _options_cache.pop(server_id, None)
+
+# Single-flight bookkeeping for player polls: concurrent callers for the same
+# server share one RCON round-trip, and a short-lived cache absorbs bursts
+_players_inflight: Dict[int, asyncio.Future] = {}
+_players_cache: Dict[int, tuple] = {}
+_PLAYERS_CACHE_TTL = 0.5
 
-def clear_max_players_cache(server_id: int):
-    """Clear cached max players when settings change"""
-    _max_players_cache.pop(server_id, None)
 
 async def get_players_count(server_id: int) -> dict:
+    """Get current players count (coalesced across concurrent callers)"""
+    loop = asyncio.get_running_loop()
+
+    cached = _players_cache.get(server_id)
+    if cached is not None and cached[1] > loop.time():
+        return cached[0]
+
+    inflight = _players_inflight.get(server_id)
+    if inflight is not None:
+        return await inflight
+
+    future = loop.create_future()
+    _players_inflight[server_id] = future
+    try:
+        result = await _fetch_players_count(server_id)
+        _players_cache[server_id] = (result, loop.time() + _PLAYERS_CACHE_TTL)
+        future.set_result(result)
+        return result
+    finally:
+        _players_inflight.pop(server_id, None)
+        # If the leader was cancelled mid-fetch, wake the coalesced waiters
+        # with the same fallback _fetch_players_count uses - otherwise they
+        # would await the unresolved future forever
+        if not future.done():
+            future.set_result({"connected": False, "current": 0, "max": 0})
+
+
+async def _fetch_players_count(server_id: int) -> dict:
     """Get current players count via RCON players command"""
     try:
         if not rcon_manager.is_connected(server_id):
             return {"connected": False, "current": 0, "max": 0}
         
-        response = rcon_manager.execute_command(server_id, "players")
+        response = await rcon_manager.execute_command(server_id, "players")
         if response is None:
             return {"connected": False, "current": 0, "max": 0}
         
-        # Parse response like "Players connected (2):"
-        import re
-        
         # Try to parse "Players connected (X):" format
-        match = re.search(r'Players connected \((\d+)\)', response)
+        match = _RE_PLAYERS_CONNECTED.search(response)
         if match:
             current = int(match.group(1))
         else:
@@ -337,12 +564,12 @@ async def websocket_endpoint(
     
     # Send initial connection status
     is_connected = rcon_manager.is_connected(server_id)
-    await websocket.send_json({
+    await websocket.send_text(_ws_encode({
         "type": "connection_status",
         "server_id": server_id,
         "connected": is_connected,
-        "timestamp": datetime.utcnow().isoformat()
-    })
+        "timestamp": datetime.utcnow()
+    }))
     
     try:
         while True:
@@ -351,29 +578,29 @@ async def websocket_endpoint(
             
             # Handle ping/pong for keepalive
             if data.get("type") == "ping":
-                await websocket.send_json({"type": "pong"})
-            
+                await websocket.send_text('{"type":"pong"}')
+
             # Handle status request
             elif data.get("type") == "get_status":
                 is_connected = rcon_manager.is_connected(server_id)
-                await websocket.send_json({
+                await websocket.send_text(_ws_encode({
                     "type": "connection_status",
                     "server_id": server_id,
                     "connected": is_connected,
-                    "timestamp": datetime.utcnow().isoformat()
-                })
-            
+                    "timestamp": datetime.utcnow()
+                }))
+
             # Handle players check - also verifies connection is alive
             elif data.get("type") == "check_players":
                 players_info = await get_players_count(server_id)
-                await websocket.send_json({
+                await websocket.send_text(_ws_encode({
                     "type": "players_count",
                     "server_id": server_id,
                     "connected": players_info["connected"],
                     "current": players_info["current"],
                     "max": players_info["max"],
-                    "timestamp": datetime.utcnow().isoformat()
-                })
+                    "timestamp": datetime.utcnow()
+                }))
                 
     except WebSocketDisconnect:
         ws_manager.disconnect(websocket, server_id)
@@ -387,24 +614,25 @@ async def websocket_endpoint(
 @app.post("/servers", response_model=ServerResponse, status_code=status.HTTP_201_CREATED)
 async def create_server(
     server: ServerCreate,
-    db: AsyncSession = Depends(get_db),
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser,
+    db: AsyncSession = Depends(get_db)
 ):
     """Create new server configuration"""
     
-    # Check if server name already exists
+    # Check if server name already exists - select just the id so no full
+    # row (including the encrypted password blob) is fetched and hydrated
     result = await db.execute(
-        select(Server).where(Server.name == server.name)
+        select(Server.id).where(Server.name == server.name).limit(1)
     )
-    if result.scalar_one_or_none():
+    if result.scalar_one_or_none() is not None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Server with name '{server.name}' already exists"
         )
     
     # Encrypt credentials
-    encrypted_password = crypto_service.encrypt(server.password)
-    encrypted_username = crypto_service.encrypt(server.username) if server.username else None
+    encrypted_password = get_crypto_service().encrypt(server.password)
+    encrypted_username = get_crypto_service().encrypt(server.username) if server.username else None
     
     # Create server
     db_server = Server(
@@ -426,9 +654,9 @@ async def create_server(
 
 @app.get("/servers", response_model=List[ServerResponse])
 async def list_servers(
+    current_user: CurrentUser,
     active_only: bool = False,
-    db: AsyncSession = Depends(get_db),
-    current_user: str = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db_ro)
 ):
     """List all servers"""
     query = select(Server)
@@ -438,14 +666,17 @@ async def list_servers(
     result = await db.execute(query.order_by(Server.name))
     servers = result.scalars().all()
     
-    return [server_to_response(s) for s in servers]
+    # Rows straight from the DB are trusted - return the encoded response
+    # directly so FastAPI skips per-row response-model validation
+    # (response_model stays on the route for the OpenAPI schema)
+    return ORJSONResponse([server_to_response(s) for s in servers])
 
 
 @app.get("/servers/{server_id}", response_model=ServerResponse)
 async def get_server(
     server_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser,
+    db: AsyncSession = Depends(get_db_ro)
 ):
     """Get server by ID"""
     result = await db.execute(
@@ -466,66 +697,67 @@ async def get_server(
 async def update_server(
     server_id: int,
     server_update: ServerUpdate,
-    db: AsyncSession = Depends(get_db),
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser,
+    db: AsyncSession = Depends(get_db)
 ):
     """Update server configuration"""
+    update_data = server_update.model_dump(exclude_unset=True)
+
+    # Encrypt password if provided
+    if "password" in update_data:
+        update_data["password"] = get_crypto_service().encrypt(update_data["password"])
+
+    # Encrypt username if provided
+    if "username" in update_data and update_data["username"]:
+        update_data["username"] = get_crypto_service().encrypt(update_data["username"])
+
+    update_data["updated_at"] = datetime.utcnow()
+
+    # Single UPDATE ... RETURNING instead of SELECT-then-mutate round-trips
     result = await db.execute(
-        select(Server).where(Server.id == server_id)
+        update(Server)
+        .where(Server.id == server_id)
+        .values(**update_data)
+        .returning(Server)
     )
     server = result.scalar_one_or_none()
-    
+
     if not server:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Server with ID {server_id} not found"
         )
-    
-    # Update fields
-    update_data = server_update.model_dump(exclude_unset=True)
-    
-    # Encrypt password if provided
-    if "password" in update_data:
-        update_data["password"] = crypto_service.encrypt(update_data["password"])
-    
-    # Encrypt username if provided
-    if "username" in update_data and update_data["username"]:
-        update_data["username"] = crypto_service.encrypt(update_data["username"])
-    
-    for field, value in update_data.items():
-        setattr(server, field, value)
-    
-    server.updated_at = datetime.utcnow()
-    
+
     await db.commit()
-    await db.refresh(server)
-    
+
+    # Settings may have changed server-side options
+    clear_options_cache(server_id)
+
     return server_to_response(server)
 
 
 @app.delete("/servers/{server_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_server(
     server_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser,
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete server"""
+    # Single DELETE; rowcount tells us whether the server existed
     result = await db.execute(
-        select(Server).where(Server.id == server_id)
+        delete(Server).where(Server.id == server_id)
     )
-    server = result.scalar_one_or_none()
-    
-    if not server:
+
+    if result.rowcount == 0:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Server with ID {server_id} not found"
         )
-    
+
     # Disconnect if connected
     if rcon_manager.is_connected(server_id):
         rcon_manager.disconnect(server_id)
-    
-    await db.delete(server)
+
     await db.commit()
 
 
@@ -534,8 +766,8 @@ async def delete_server(
 @app.post("/servers/{server_id}/connect")
 async def connect_to_server(
     server_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser,
+    db: AsyncSession = Depends(get_db)
 ):
     """Connect to server via RCON"""
     result = await db.execute(
@@ -550,17 +782,21 @@ async def connect_to_server(
         )
     
     # Decrypt credentials
-    password = crypto_service.decrypt(server.password)
-    username = crypto_service.decrypt(server.username) if server.username else None
+    password = get_crypto_service().decrypt(server.password)
+    username = get_crypto_service().decrypt(server.username) if server.username else None
     
     try:
         await rcon_manager.connect(server_id, server.host, server.port, password, username)
+        # Re-fetch showoptions on the next poll after a fresh connect
+        clear_options_cache(server_id)
         # Broadcast connection status via WebSocket
-        await ws_manager.broadcast_connection_status(server_id, True)
+        if ws_manager.has_subscribers(server_id):
+            await ws_manager.broadcast_connection_status(server_id, True)
         return {"message": f"Connected to {server.name}", "server_id": server_id}
     except RCONError as e:
         # Broadcast disconnection via WebSocket
-        await ws_manager.broadcast_connection_status(server_id, False)
+        if ws_manager.has_subscribers(server_id):
+            await ws_manager.broadcast_connection_status(server_id, False)
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail=str(e)
@@ -570,7 +806,7 @@ async def connect_to_server(
 @app.post("/servers/{server_id}/disconnect")
 async def disconnect_from_server(
     server_id: int,
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser
 ):
     """Disconnect from server"""
     if not rcon_manager.is_connected(server_id):
@@ -580,15 +816,17 @@ async def disconnect_from_server(
         )
     
     rcon_manager.disconnect(server_id)
+    clear_options_cache(server_id)
     # Broadcast disconnection via WebSocket
-    await ws_manager.broadcast_connection_status(server_id, False)
+    if ws_manager.has_subscribers(server_id):
+        await ws_manager.broadcast_connection_status(server_id, False)
     return {"message": f"Disconnected from server {server_id}"}
 
 
 @app.get("/servers/{server_id}/status", response_model=ConnectionStatus)
 async def get_connection_status(
     server_id: int,
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser
 ):
     """Get connection status for server"""
     is_connected = rcon_manager.is_connected(server_id)
@@ -606,48 +844,49 @@ async def get_connection_status(
 async def execute_command(
     server_id: int,
     command: CommandExecute,
-    db: AsyncSession = Depends(get_db),
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser
 ):
     """Execute RCON command on server"""
-    
+
     # Check if connected
     if not rcon_manager.is_connected(server_id):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Not connected to server {server_id}. Connect first."
         )
-    
+
     try:
         # Execute command
-        response = rcon_manager.execute_command(server_id, command.command)
-        
-        # Log command
-        log_entry = CommandLog(
-            server_id=server_id,
-            command=command.command,
-            response=response,
-            success=True
-        )
-        db.add(log_entry)
-        await db.commit()
-        
+        response = await rcon_manager.execute_command(server_id, command.command)
+
+        # An arbitrary admin command may have changed server options
+        # (changeoption, reloadoptions, ...) - drop the cached showoptions
+        clear_options_cache(server_id)
+
+        # Log command (flushed in batches off the response path)
+        enqueue_command_log({
+            "server_id": server_id,
+            "command": command.command,
+            "response": response,
+            "success": True,
+            "executed_at": datetime.utcnow()
+        })
+
         return CommandResponse(
             success=True,
             response=response
         )
-        
+
     except RCONError as e:
         # Log failed command
-        log_entry = CommandLog(
-            server_id=server_id,
-            command=command.command,
-            success=False,
-            error_message=str(e)
-        )
-        db.add(log_entry)
-        await db.commit()
-        
+        enqueue_command_log({
+            "server_id": server_id,
+            "command": command.command,
+            "success": False,
+            "error_message": str(e),
+            "executed_at": datetime.utcnow()
+        })
+
         return CommandResponse(
             success=False,
             error=str(e)
@@ -659,7 +898,7 @@ async def execute_command(
 @app.get("/servers/{server_id}/options")
 async def get_server_options(
     server_id: int,
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser
 ):
     """Get server options via showoptions RCON command"""
     if not rcon_manager.is_connected(server_id):
@@ -669,34 +908,22 @@ async def get_server_options(
         )
     
     try:
-        response = rcon_manager.execute_command(server_id, "showoptions")
-        
-        # Parse key=value pairs from response
+        # One cached showoptions round-trip shared with get_max_players
+        all_options, raw = await _load_options(server_id)
+
         options = {}
         mods_data = {}
-        
-        for line in response.split('\n'):
-            line = line.strip()
-            if '=' in line:
-                # Split only on first '=' to handle values with '=' in them
-                key, value = line.split('=', 1)
-                key = key.strip()
-                value = value.strip()
-                
-                # Remove leading "* " from keys (PZ format)
-                if key.startswith('* '):
-                    key = key[2:]
-                
-                # Separate mods-related options
-                if key in ['Mods', 'WorkshopItems', 'Map']:
-                    mods_data[key] = value
-                else:
-                    options[key] = value
-        
+        for key, value in all_options.items():
+            # Separate mods-related options
+            if key in ('Mods', 'WorkshopItems', 'Map'):
+                mods_data[key] = value
+            else:
+                options[key] = value
+
         return {
             "options": options,
             "mods": mods_data,
-            "raw": response
+            "raw": raw
         }
     except RCONError as e:
         raise HTTPException(
@@ -711,12 +938,11 @@ async def fetch_workshop_details_via_api(workshop_id: str) -> dict:
     """Fetch mod details via Steam API (faster and more reliable than HTML parsing)"""
     url = "https://api.steampowered.com/ISteamRemoteStorage/GetPublishedFileDetails/v1/"
     
-    async with httpx.AsyncClient(timeout=15.0) as client:
-        response = await client.post(url, data={
-            "itemcount": "1",
-            "publishedfileids[0]": workshop_id
-        })
-        result = response.json()
+    response = await get_steam_client().post(url, data={
+        "itemcount": "1",
+        "publishedfileids[0]": workshop_id
+    })
+    result = response.json()
     
     details = result.get('response', {}).get('publishedfiledetails', [{}])[0]
     
@@ -725,20 +951,22 @@ async def fetch_workshop_details_via_api(workshop_id: str) -> dict:
     
     description = details.get('description', '')
     
-    # Extract Mod IDs from description
-    mod_ids = []
-    for match in re.finditer(r'Mod\s*ID[:\s]+([A-Za-z0-9_-]+)', description, re.IGNORECASE):
+    # Extract Mod IDs from description; dict-as-ordered-set keeps insertion
+    # order with O(1) membership instead of O(N) list scans
+    seen: dict[str, None] = {}
+    for match in _RE_MOD_ID.finditer(description):
         mod_id = match.group(1).strip()
-        if mod_id and mod_id not in mod_ids and len(mod_id) > 1:
-            mod_ids.append(mod_id)
+        if mod_id and len(mod_id) > 1:
+            seen.setdefault(mod_id, None)
+    mod_ids = list(seen)
     
     # Extract dependencies from [h1]Required[/h1] section
     dependencies = []
-    required_match = re.search(r'\[h1\]Required[^[]*\[/h1\](.*?)(?:\[h1\]|\Z)', description, re.IGNORECASE | re.DOTALL)
+    required_match = _RE_REQUIRED_SECTION.search(description)
     if required_match:
         required_section = required_match.group(1)
-        dep_ids = re.findall(r'\[url=[^]]*\?id=(\d+)[^]]*\]', required_section)
-        dependencies = list(set(dep_ids))
+        dep_ids = _RE_DEPENDENCY_ID.findall(required_section)
+        dependencies = list(dict.fromkeys(dep_ids))
     
     return {
         'workshop_id': workshop_id,
@@ -751,7 +979,7 @@ async def fetch_workshop_details_via_api(workshop_id: str) -> dict:
 @app.post("/mods/parse", response_model=ModParseResponse)
 async def parse_workshop_url(
     request: ModParseRequest,
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser
 ):
     """Parse Steam Workshop URL to extract mod info via Steam API"""
     from app.schemas import ModDependency
@@ -759,7 +987,7 @@ async def parse_workshop_url(
     url = request.url
     
     # Extract workshop ID from URL
-    match = re.search(r'id=(\d+)', url)
+    match = _RE_WORKSHOP_ID.search(url)
     if not match:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -805,12 +1033,11 @@ async def fetch_collection_details(collection_id: str) -> dict:
     """Fetch collection details via Steam API"""
     url = "https://api.steampowered.com/ISteamRemoteStorage/GetCollectionDetails/v1/"
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.post(url, data={
-            "collectioncount": "1",
-            "publishedfileids[0]": collection_id
-        })
-        result = response.json()
+    response = await get_steam_client().post(url, data={
+        "collectioncount": "1",
+        "publishedfileids[0]": collection_id
+    }, timeout=30.0)
+    result = response.json()
     
     details = result.get('response', {}).get('collectiondetails', [{}])[0]
     
@@ -829,7 +1056,7 @@ async def fetch_collection_details(collection_id: str) -> dict:
 @app.post("/mods/parse-collection")
 async def parse_collection_url(
     request: ModParseRequest,
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser
 ):
     """Parse Steam Workshop Collection URL to get all mods"""
     from app.schemas import CollectionParseResponse, CollectionModInfo
@@ -837,7 +1064,7 @@ async def parse_collection_url(
     url = request.url
     
     # Extract collection ID from URL
-    match = re.search(r'id=(\d+)', url)
+    match = _RE_WORKSHOP_ID.search(url)
     if not match:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -894,8 +1121,8 @@ async def parse_collection_url(
 @app.get("/servers/{server_id}/mods", response_model=List[ModResponse])
 async def list_server_mods(
     server_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser,
+    db: AsyncSession = Depends(get_db_ro)
 ):
     """List all mods for a server"""
     result = await db.execute(
@@ -905,32 +1132,43 @@ async def list_server_mods(
     )
     mods = result.scalars().all()
     
-    # Convert stored semicolon-separated strings to lists
-    response = []
-    for mod in mods:
-        mod_ids = mod.mod_ids.split(';') if mod.mod_ids else []
-        enabled_mod_ids = mod.enabled_mod_ids.split(';') if mod.enabled_mod_ids else []
-        response.append(ModResponse(
-            id=mod.id,
-            server_id=mod.server_id,
-            workshop_id=mod.workshop_id,
-            mod_ids=mod_ids,
-            enabled_mod_ids=enabled_mod_ids,
-            name=mod.name,
-            is_enabled=mod.is_enabled,
-            workshop_url=mod.workshop_url,
-            created_at=mod.created_at,
-            updated_at=mod.updated_at
-        ))
-    return response
+    # Same trusted-data fast path as list_servers: skip per-row validation
+    return ORJSONResponse([
+        {
+            "id": mod.id,
+            "server_id": mod.server_id,
+            "workshop_id": mod.workshop_id,
+            "mod_ids": mod.mod_ids or [],
+            "enabled_mod_ids": mod.enabled_mod_ids or [],
+            "name": mod.name,
+            "is_enabled": mod.is_enabled,
+            "workshop_url": mod.workshop_url,
+            "created_at": mod.created_at,
+            "updated_at": mod.updated_at
+        }
+        for mod in mods
+    ])
+
+
+def _merge_ids(existing: Optional[list], incoming: list) -> list:
+    """Merge two mod-id lists, deduped, preserving first-seen order.
+
+    Skips the concatenation entirely when one side is empty - the common
+    case on import/sync of a fresh database.
+    """
+    if not existing:
+        return list(dict.fromkeys(incoming))
+    if not incoming:
+        return existing
+    return list(dict.fromkeys(existing + incoming))
 
 
 @app.post("/servers/{server_id}/mods", response_model=ModResponse, status_code=status.HTTP_201_CREATED)
 async def add_server_mod(
     server_id: int,
     mod: ModCreate,
-    db: AsyncSession = Depends(get_db),
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser,
+    db: AsyncSession = Depends(get_db)
 ):
     """Add a mod to server (one record per workshop_id with multiple mod_ids)"""
     # Check if mod already exists for this server
@@ -944,14 +1182,12 @@ async def add_server_mod(
     
     if existing_mod:
         # Update existing record - merge mod_ids
-        existing_mod_ids = existing_mod.mod_ids.split(';') if existing_mod.mod_ids else []
-        new_mod_ids = list(set(existing_mod_ids + mod.mod_ids))  # Merge and dedupe
-        existing_mod.mod_ids = ';'.join(new_mod_ids)
+        new_mod_ids = _merge_ids(existing_mod.mod_ids, mod.mod_ids)
+        existing_mod.mod_ids = new_mod_ids
         
         # Merge enabled_mod_ids
-        existing_enabled = existing_mod.enabled_mod_ids.split(';') if existing_mod.enabled_mod_ids else []
-        new_enabled = list(set(existing_enabled + mod.enabled_mod_ids))
-        existing_mod.enabled_mod_ids = ';'.join(new_enabled)
+        new_enabled = _merge_ids(existing_mod.enabled_mod_ids, mod.enabled_mod_ids)
+        existing_mod.enabled_mod_ids = new_enabled
         
         existing_mod.is_enabled = len(new_enabled) > 0
         existing_mod.updated_at = datetime.utcnow()
@@ -973,14 +1209,11 @@ async def add_server_mod(
         )
     
     # Create new record
-    mod_ids_str = ';'.join(mod.mod_ids) if mod.mod_ids else ''
-    enabled_mod_ids_str = ';'.join(mod.enabled_mod_ids) if mod.enabled_mod_ids else ''
-    
     db_mod = ServerMod(
         server_id=server_id,
         workshop_id=mod.workshop_id,
-        mod_ids=mod_ids_str,
-        enabled_mod_ids=enabled_mod_ids_str,
+        mod_ids=mod.mod_ids,
+        enabled_mod_ids=mod.enabled_mod_ids,
         name=mod.name,
         is_enabled=len(mod.enabled_mod_ids) > 0,
         workshop_url=f"https://steamcommunity.com/sharedfiles/filedetails/?id={mod.workshop_id}"
@@ -1009,55 +1242,44 @@ async def update_server_mod(
     server_id: int,
     mod_id: int,
     mod_update: ModUpdate,
-    db: AsyncSession = Depends(get_db),
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser,
+    db: AsyncSession = Depends(get_db)
 ):
     """Update a mod"""
+    update_data = mod_update.model_dump(exclude_unset=True)
+
+    if 'enabled_mod_ids' in update_data:
+        # Update is_enabled based on whether any mod_ids are enabled
+        update_data['is_enabled'] = bool(update_data['enabled_mod_ids'])
+
+    update_data['updated_at'] = datetime.utcnow()
+
+    # Single UPDATE ... RETURNING instead of SELECT-then-mutate round-trips
     result = await db.execute(
-        select(ServerMod).where(
+        update(ServerMod)
+        .where(
             ServerMod.id == mod_id,
             ServerMod.server_id == server_id
         )
+        .values(**update_data)
+        .returning(ServerMod)
     )
     mod = result.scalar_one_or_none()
-    
+
     if not mod:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Mod not found"
         )
-    
-    update_data = mod_update.model_dump(exclude_unset=True)
-    
-    # Handle list fields - convert to semicolon-separated strings
-    if 'mod_ids' in update_data:
-        mod.mod_ids = ';'.join(update_data['mod_ids']) if update_data['mod_ids'] else ''
-        del update_data['mod_ids']
-    
-    if 'enabled_mod_ids' in update_data:
-        mod.enabled_mod_ids = ';'.join(update_data['enabled_mod_ids']) if update_data['enabled_mod_ids'] else ''
-        # Update is_enabled based on whether any mod_ids are enabled
-        mod.is_enabled = len(update_data['enabled_mod_ids']) > 0
-        del update_data['enabled_mod_ids']
-    
-    # Handle other fields
-    for field, value in update_data.items():
-        setattr(mod, field, value)
-    
-    mod.updated_at = datetime.utcnow()
+
     await db.commit()
-    await db.refresh(mod)
-    
-    # Convert back to list for response
-    mod_ids_list = mod.mod_ids.split(';') if mod.mod_ids else []
-    enabled_mod_ids_list = mod.enabled_mod_ids.split(';') if mod.enabled_mod_ids else []
-    
+
     return ModResponse(
         id=mod.id,
         server_id=mod.server_id,
         workshop_id=mod.workshop_id,
-        mod_ids=mod_ids_list,
-        enabled_mod_ids=enabled_mod_ids_list,
+        mod_ids=mod.mod_ids or [],
+        enabled_mod_ids=mod.enabled_mod_ids or [],
         name=mod.name,
         is_enabled=mod.is_enabled,
         workshop_url=mod.workshop_url,
@@ -1070,33 +1292,31 @@ async def update_server_mod(
 async def delete_server_mod(
     server_id: int,
     mod_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser,
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a mod from server"""
     result = await db.execute(
-        select(ServerMod).where(
+        delete(ServerMod).where(
             ServerMod.id == mod_id,
             ServerMod.server_id == server_id
         )
     )
-    mod = result.scalar_one_or_none()
-    
-    if not mod:
+
+    if result.rowcount == 0:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Mod not found"
         )
-    
-    await db.delete(mod)
+
     await db.commit()
 
 
 @app.post("/servers/{server_id}/mods/apply")
 async def apply_mods_to_server(
     server_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser,
+    db: AsyncSession = Depends(get_db)
 ):
     """Apply mods configuration to server via RCON"""
     if not rcon_manager.is_connected(server_id):
@@ -1125,7 +1345,7 @@ async def apply_mods_to_server(
     all_workshop_ids = []
     
     for mod in enabled_mods:
-        enabled_mod_ids = mod.enabled_mod_ids.split(';') if mod.enabled_mod_ids else []
+        enabled_mod_ids = mod.enabled_mod_ids or []
         if enabled_mod_ids:
             all_mod_ids.extend(enabled_mod_ids)
             # Add workshop_id once for each mod record that has enabled mod_ids
@@ -1137,26 +1357,27 @@ async def apply_mods_to_server(
             detail="No enabled mod IDs to apply"
         )
     
-    # Build command strings with backslash prefix for mod_ids
-    mod_ids_str = ";".join([f"\\{mid}" for mid in all_mod_ids])
+    # Build command strings with backslash prefix for mod_ids; the prefix
+    # join avoids formatting every element individually, and each (possibly
+    # multi-KB) command string is built exactly once
+    mod_ids_str = "\\" + ";\\".join(all_mod_ids)
     workshop_ids_str = ";".join(all_workshop_ids)
+    mods_command = f'changeoption Mods "{mod_ids_str}"'
+    workshop_command = f'changeoption WorkshopItems "{workshop_ids_str}"'
     
     try:
         # Execute changeoption commands
-        mods_result = rcon_manager.execute_command(
-            server_id, 
-            f'changeoption Mods "{mod_ids_str}"'
-        )
+        mods_result = await rcon_manager.execute_command(server_id, mods_command)
         
-        workshop_result = rcon_manager.execute_command(
-            server_id,
-            f'changeoption WorkshopItems "{workshop_ids_str}"'
-        )
+        workshop_result = await rcon_manager.execute_command(server_id, workshop_command)
+        
+        # The changeoption calls just altered what showoptions reports
+        clear_options_cache(server_id)
         
         return {
             "success": True,
-            "mods_command": f'changeoption Mods "{mod_ids_str}"',
-            "workshop_command": f'changeoption WorkshopItems "{workshop_ids_str}"',
+            "mods_command": mods_command,
+            "workshop_command": workshop_command,
             "mods_result": mods_result,
             "workshop_result": workshop_result,
             "enabled_count": len(all_mod_ids),
@@ -1173,25 +1394,32 @@ async def apply_mods_to_server(
 @app.get("/servers/{server_id}/mods/export", response_model=ModsExport)
 async def export_server_mods(
     server_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser,
+    db: AsyncSession = Depends(get_db_ro)
 ):
     """Export all mods for a server"""
+    # Only five columns leave this endpoint - project them directly instead
+    # of hydrating full ORM instances per row
     result = await db.execute(
-        select(ServerMod).where(ServerMod.server_id == server_id)
+        select(
+            ServerMod.workshop_id,
+            ServerMod.mod_ids,
+            ServerMod.enabled_mod_ids,
+            ServerMod.name,
+            ServerMod.is_enabled
+        ).where(ServerMod.server_id == server_id)
     )
-    mods = result.scalars().all()
     
     return ModsExport(
         mods=[
             ModCreate(
-                workshop_id=mod.workshop_id,
-                mod_ids=mod.mod_ids.split(';') if mod.mod_ids else [],
-                enabled_mod_ids=mod.enabled_mod_ids.split(';') if mod.enabled_mod_ids else [],
-                name=mod.name,
-                is_enabled=mod.is_enabled
+                workshop_id=workshop_id,
+                mod_ids=mod_ids or [],
+                enabled_mod_ids=enabled_mod_ids or [],
+                name=name,
+                is_enabled=is_enabled
             )
-            for mod in mods
+            for workshop_id, mod_ids, enabled_mod_ids, name, is_enabled in result
         ]
     )
 
@@ -1200,7 +1428,7 @@ async def export_server_mods(
 async def download_server_mods(
     server_id: int,
     token: str = Query(...),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db_ro)
 ):
     """Download mods as JSON file"""
     # Verify token manually since we get it from query param
@@ -1209,37 +1437,45 @@ async def download_server_mods(
     except:
         raise HTTPException(status_code=401, detail="Invalid token")
     
-    # Get server name for filename
-    server_result = await db.execute(select(Server).where(Server.id == server_id))
-    server = server_result.scalar_one_or_none()
-    server_name = server.name if server else f"server_{server_id}"
+    # Get server name for filename (name column only - no full row)
+    server_result = await db.execute(select(Server.name).where(Server.id == server_id))
+    server_name = server_result.scalar_one_or_none() or f"server_{server_id}"
     # Sanitize filename
-    server_name = re.sub(r'[^a-zA-Z0-9а-яА-ЯіІїЇєЄ_-]', '_', server_name)
+    server_name = _RE_SERVER_NAME_SAFE.sub('_', server_name)
     
+    # Same column projection as export_server_mods
     result = await db.execute(
-        select(ServerMod).where(ServerMod.server_id == server_id)
+        select(
+            ServerMod.workshop_id,
+            ServerMod.mod_ids,
+            ServerMod.enabled_mod_ids,
+            ServerMod.name,
+            ServerMod.is_enabled
+        ).where(ServerMod.server_id == server_id)
     )
-    mods = result.scalars().all()
-    
-    export_data = {
-        "mods": [
-            {
-                "workshop_id": mod.workshop_id,
-                "mod_ids": mod.mod_ids.split(';') if mod.mod_ids else [],
-                "enabled_mod_ids": mod.enabled_mod_ids.split(';') if mod.enabled_mod_ids else [],
-                "name": mod.name,
-                "is_enabled": mod.is_enabled
-            }
-            for mod in mods
-        ]
-    }
-    
-    from datetime import datetime
-    now = datetime.now()
-    filename = f"{server_name}_{now.strftime('%Y-%m-%d_%H-%M-%S')}.json"
     
-    return Response(
-        content=json.dumps(export_data, indent=2, ensure_ascii=False),
+    rows = result.all()
+    
+    filename = f"{server_name}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json"
+    
+    def _encode_export():
+        # Encode row by row so peak memory stays at one serialized mod
+        # instead of the whole export document
+        yield b'{"mods":['
+        for i, (workshop_id, mod_ids, enabled_mod_ids, name, is_enabled) in enumerate(rows):
+            if i:
+                yield b','
+            yield orjson.dumps({
+                "workshop_id": workshop_id,
+                "mod_ids": mod_ids or [],
+                "enabled_mod_ids": enabled_mod_ids or [],
+                "name": name,
+                "is_enabled": is_enabled
+            })
+        yield b']}'
+    
+    return StreamingResponse(
+        _encode_export(),
         media_type="application/json",
         headers={
             "Content-Disposition": f'attachment; filename="{filename}"'
@@ -1251,60 +1487,95 @@ async def download_server_mods(
 async def import_server_mods(
     server_id: int,
     mods_export: ModsExport,
-    db: AsyncSession = Depends(get_db),
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser,
+    db: AsyncSession = Depends(get_db)
 ):
     """Import mods to a server"""
     imported = 0
     updated = 0
-    
-    for mod_data in mods_export.mods:
-        # Check if already exists
-        result = await db.execute(
-            select(ServerMod).where(
-                ServerMod.server_id == server_id,
-                ServerMod.workshop_id == mod_data.workshop_id
-            )
+
+    # One bulk SELECT for all incoming workshop_ids instead of a query per mod
+    incoming_ids = [m.workshop_id for m in mods_export.mods]
+    result = await db.execute(
+        select(ServerMod).where(
+            ServerMod.server_id == server_id,
+            ServerMod.workshop_id.in_(incoming_ids)
         )
-        existing = result.scalar_one_or_none()
-        
+    )
+    existing_by_wid = {m.workshop_id: m for m in result.scalars().all()}
+
+    # Rows to bulk-insert at the end, keyed by workshop_id so payload
+    # duplicates merge instead of inserting twice
+    new_by_wid: Dict[str, dict] = {}
+
+    for mod_data in mods_export.mods:
+        existing = existing_by_wid.get(mod_data.workshop_id)
+
         if existing:
             # Update existing - merge mod_ids
-            existing_mod_ids = existing.mod_ids.split(';') if existing.mod_ids else []
-            new_mod_ids = list(set(existing_mod_ids + mod_data.mod_ids))
-            existing.mod_ids = ';'.join(new_mod_ids)
+            existing.mod_ids = _merge_ids(existing.mod_ids, mod_data.mod_ids)
             
             # Merge enabled_mod_ids
-            existing_enabled = existing.enabled_mod_ids.split(';') if existing.enabled_mod_ids else []
-            new_enabled = list(set(existing_enabled + mod_data.enabled_mod_ids))
-            existing.enabled_mod_ids = ';'.join(new_enabled)
+            new_enabled = _merge_ids(existing.enabled_mod_ids, mod_data.enabled_mod_ids)
+            existing.enabled_mod_ids = new_enabled
             existing.is_enabled = len(new_enabled) > 0
             existing.updated_at = datetime.utcnow()
             updated += 1
         else:
-            # Create new
-            db_mod = ServerMod(
-                server_id=server_id,
-                workshop_id=mod_data.workshop_id,
-                mod_ids=';'.join(mod_data.mod_ids) if mod_data.mod_ids else '',
-                enabled_mod_ids=';'.join(mod_data.enabled_mod_ids) if mod_data.enabled_mod_ids else '',
-                name=mod_data.name,
-                is_enabled=len(mod_data.enabled_mod_ids) > 0,
-                workshop_url=f"https://steamcommunity.com/sharedfiles/filedetails/?id={mod_data.workshop_id}"
-            )
-            db.add(db_mod)
+            pending = new_by_wid.get(mod_data.workshop_id)
+            if pending is not None:
+                # Duplicate workshop_id within the payload - merge in place
+                pending["mod_ids"] = _merge_ids(pending["mod_ids"], mod_data.mod_ids)
+                pending["enabled_mod_ids"] = _merge_ids(pending["enabled_mod_ids"], mod_data.enabled_mod_ids)
+                pending["is_enabled"] = len(pending["enabled_mod_ids"]) > 0
+                continue
+            now = datetime.utcnow()
+            row = {
+                "server_id": server_id,
+                "workshop_id": mod_data.workshop_id,
+                "mod_ids": mod_data.mod_ids,
+                "enabled_mod_ids": mod_data.enabled_mod_ids,
+                "name": mod_data.name,
+                "is_enabled": len(mod_data.enabled_mod_ids) > 0,
+                "workshop_url": f"https://steamcommunity.com/sharedfiles/filedetails/?id={mod_data.workshop_id}",
+                "created_at": now,
+                "updated_at": now
+            }
+            new_by_wid[mod_data.workshop_id] = row
             imported += 1
-    
+
+    # Single executemany for all new rows instead of one INSERT per object
+    if new_by_wid:
+        await db.execute(insert(ServerMod).values(list(new_by_wid.values())))
+
     await db.commit()
-    
+
     return {"imported": imported, "updated": updated}
 
 
+
+def _parse_server_mod_lists(response: str) -> tuple[list, list]:
+    """Extract the Mods and WorkshopItems lists from showoptions output.
+
+    A single compiled-regex pass over the whole response replaces the old
+    line-by-line substring scanning.
+    """
+    server_mods = []
+    server_workshops = []
+    for match in _RE_MODS_OPTION.finditer(response):
+        value = match.group(2).strip()
+        if match.group(1) == 'Mods':
+            server_mods = [m.lstrip('\\').strip() for m in value.split(';') if m.strip()]
+        else:
+            server_workshops = [w.strip() for w in value.split(';') if w.strip()]
+    return server_mods, server_workshops
+
+
 @app.get("/servers/{server_id}/mods/server-workshop-ids")
 async def get_server_workshop_ids(
     server_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser,
+    db: AsyncSession = Depends(get_db_ro)
 ):
     """
     Get list of workshop IDs from server via RCON showoptions.
@@ -1317,37 +1588,29 @@ async def get_server_workshop_ids(
         )
     
     try:
-        # Get current server options
-        response = rcon_manager.execute_command(server_id, "showoptions")
-        
-        # Parse WorkshopItems
-        server_workshops = []
-        server_mods = []
-        
-        for line in response.split('\n'):
-            line = line.strip()
-            if 'WorkshopItems=' in line:
-                workshops_part = line.split('WorkshopItems=')[1].strip().strip('"')
-                server_workshops = [w.strip() for w in workshops_part.split(';') if w.strip()]
-            elif 'Mods=' in line:
-                mods_part = line.split('Mods=')[1].strip().strip('"')
-                server_mods = [m.lstrip('\\').strip() for m in mods_part.split(';') if m.strip()]
-        
-        # Get existing workshop IDs from database
-        result = await db.execute(
-            select(ServerMod.workshop_id).where(ServerMod.server_id == server_id)
+        # The RCON round-trip and the DB read are independent - run them
+        # concurrently so latency is max(rcon, db) instead of the sum.
+        # The projection is consumed via scalars() so no Row objects are
+        # materialized.
+        response, result = await asyncio.gather(
+            rcon_manager.execute_command(server_id, "showoptions"),
+            db.execute(select(ServerMod.workshop_id).where(ServerMod.server_id == server_id))
         )
-        existing_workshop_ids = set(row[0] for row in result.fetchall())
         
-        # Filter out already existing ones
-        new_workshop_ids = [wid for wid in server_workshops if wid not in existing_workshop_ids]
-        existing_on_server = [wid for wid in server_workshops if wid in existing_workshop_ids]
+        # Parse Mods and WorkshopItems in one regex pass
+        server_mods, server_workshops = _parse_server_mod_lists(response)
         
-        # Create workshop_id -> mod_id mapping for existing ones that need update
-        workshop_to_mod = {}
-        for i, wid in enumerate(server_workshops):
-            if i < len(server_mods):
-                workshop_to_mod[wid] = server_mods[i]
+        existing_workshop_ids = set(result.scalars())
+        
+        # Partition into new/existing in a single pass
+        new_workshop_ids = []
+        existing_on_server = []
+        for wid in server_workshops:
+            (existing_on_server if wid in existing_workshop_ids else new_workshop_ids).append(wid)
+
+        # Create workshop_id -> mod_id mapping for existing ones that need
+        # update; zip truncates to the shorter list automatically
+        workshop_to_mod = dict(zip(server_workshops, server_mods))
         
         return {
             "new_workshop_ids": new_workshop_ids,
@@ -1366,8 +1629,8 @@ async def get_server_workshop_ids(
 @app.post("/servers/{server_id}/mods/sync")
 async def sync_mods_from_server(
     server_id: int,
-    db: AsyncSession = Depends(get_db),
-    current_user: str = Depends(get_current_user)
+    current_user: CurrentUser,
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Synchronize mods from server with local database.
@@ -1390,23 +1653,20 @@ async def sync_mods_from_server(
     }
     
     try:
-        # Get current server options
-        response = rcon_manager.execute_command(server_id, "showoptions")
-        
-        # Parse Mods and WorkshopItems
-        server_mods = []  # List of mod_id
-        server_workshops = []  # List of workshop_id
+        # The RCON round-trip and the DB read are independent - run them
+        # concurrently so latency is max(rcon, db) instead of the sum.
+        # The projection carries just the columns the merge needs instead
+        # of full ORM instances we would only dirty-track.
+        response, result = await asyncio.gather(
+            rcon_manager.execute_command(server_id, "showoptions"),
+            db.execute(
+                select(ServerMod.workshop_id, ServerMod.mod_ids, ServerMod.name)
+                .where(ServerMod.server_id == server_id)
+            )
+        )
         
-        for line in response.split('\n'):
-            line = line.strip()
-            # Handle "* Mods=" or "Mods=" format
-            if 'Mods=' in line:
-                mods_part = line.split('Mods=')[1].strip().strip('"')
-                # Split by ; and remove \ prefix
-                server_mods = [m.lstrip('\\').strip() for m in mods_part.split(';') if m.strip()]
-            elif 'WorkshopItems=' in line:
-                workshops_part = line.split('WorkshopItems=')[1].strip().strip('"')
-                server_workshops = [w.strip() for w in workshops_part.split(';') if w.strip()]
+        # Parse Mods and WorkshopItems in one regex pass
+        server_mods, server_workshops = _parse_server_mod_lists(response)
         
         # Create mapping: workshop_id -> list of mod_ids
         # The order of Mods and WorkshopItems should correspond
@@ -1417,67 +1677,82 @@ async def sync_mods_from_server(
             if i < len(server_mods):
                 workshop_to_mods[workshop_id].append(server_mods[i])
         
-        # Get all existing mods from database for this server
-        result = await db.execute(
-            select(ServerMod).where(ServerMod.server_id == server_id)
-        )
-        db_mods_by_workshop = {mod.workshop_id: mod for mod in result.scalars().all()}
-        
-        # Disable all mods first (we'll enable the active ones)
-        for mod in db_mods_by_workshop.values():
-            mod.is_enabled = False
-            mod.enabled_mod_ids = ''
+        db_info_by_workshop = {wid: (mod_ids, name) for wid, mod_ids, name in result}
         
-        # Process each workshop item from server
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            for workshop_id, active_mod_ids in workshop_to_mods.items():
-                try:
-                    existing_mod = db_mods_by_workshop.get(workshop_id)
-                    
-                    if existing_mod:
-                        # Update existing record
-                        existing_mod_ids = existing_mod.mod_ids.split(';') if existing_mod.mod_ids else []
-                        # Merge with new mod_ids
-                        merged_mod_ids = list(set(existing_mod_ids + active_mod_ids))
-                        existing_mod.mod_ids = ';'.join(merged_mod_ids)
-                        # Set enabled mod_ids to the ones currently on server
-                        existing_mod.enabled_mod_ids = ';'.join(active_mod_ids)
-                        existing_mod.is_enabled = len(active_mod_ids) > 0
-                        existing_mod.updated_at = datetime.utcnow()
-                        sync_result["updated"] += 1
-                        sync_result["mods_found"].append({
-                            "workshop_id": workshop_id,
-                            "mod_ids": merged_mod_ids,
-                            "enabled_mod_ids": active_mod_ids,
-                            "name": existing_mod.name,
-                            "status": "updated"
-                        })
-                    else:
-                        # New workshop item - fetch name from Steam
-                        name = await fetch_mod_name_from_steam(client, workshop_id)
-                        
-                        new_mod = ServerMod(
-                            server_id=server_id,
-                            workshop_id=workshop_id,
-                            mod_ids=';'.join(active_mod_ids),
-                            enabled_mod_ids=';'.join(active_mod_ids),
-                            name=name or f"Workshop {workshop_id}",
-                            is_enabled=len(active_mod_ids) > 0,
-                            workshop_url=f"https://steamcommunity.com/sharedfiles/filedetails/?id={workshop_id}"
-                        )
-                        db.add(new_mod)
-                        sync_result["added"] += 1
-                        sync_result["mods_found"].append({
-                            "workshop_id": workshop_id,
-                            "mod_ids": active_mod_ids,
-                            "enabled_mod_ids": active_mod_ids,
-                            "name": name,
-                            "status": "added"
-                        })
-                        
-                except Exception as e:
-                    sync_result["errors"].append(f"Error processing workshop {workshop_id}: {str(e)}")
+        # Fetch names for new workshop items concurrently - these are
+        # independent Steam round-trips and the dominant sync latency.
+        # The semaphore keeps us polite towards Steam.
+        client = get_steam_client()
+        new_ids = [wid for wid in workshop_to_mods if wid not in db_info_by_workshop]
+        names: Dict[str, Optional[str]] = {}
+        if new_ids:
+            fetch_sem = asyncio.Semaphore(8)
+
+            async def _fetch_name(wid: str):
+                async with fetch_sem:
+                    return wid, await fetch_mod_name_from_steam(client, wid)
+
+            names = dict(await asyncio.gather(*(_fetch_name(wid) for wid in new_ids)))
+
+        # Build one row per workshop item on the server
+        rows = []
+        for workshop_id, active_mod_ids in workshop_to_mods.items():
+            try:
+                existing = db_info_by_workshop.get(workshop_id)
+                now = datetime.utcnow()
+                
+                if existing:
+                    existing_mod_ids, existing_name = existing
+                    merged_mod_ids = _merge_ids(existing_mod_ids, active_mod_ids)
+                    name = existing_name
+                    status_label = "updated"
+                    sync_result["updated"] += 1
+                else:
+                    merged_mod_ids = active_mod_ids
+                    name = names.get(workshop_id)
+                    status_label = "added"
+                    sync_result["added"] += 1
+                
+                rows.append({
+                    "server_id": server_id,
+                    "workshop_id": workshop_id,
+                    "mod_ids": merged_mod_ids,
+                    "enabled_mod_ids": active_mod_ids,
+                    "name": name or f"Workshop {workshop_id}",
+                    "is_enabled": len(active_mod_ids) > 0,
+                    "workshop_url": f"https://steamcommunity.com/sharedfiles/filedetails/?id={workshop_id}",
+                    "created_at": now,
+                    "updated_at": now
+                })
+                sync_result["mods_found"].append({
+                    "workshop_id": workshop_id,
+                    "mod_ids": merged_mod_ids,
+                    "enabled_mod_ids": active_mod_ids,
+                    "name": name,
+                    "status": status_label
+                })
+            except Exception as e:
+                sync_result["errors"].append(f"Error processing workshop {workshop_id}: {str(e)}")
         
+        # Disable everything first with one UPDATE, then UPSERT the active
+        # rows in one executemany - no per-row ORM dirty tracking at all
+        await db.execute(
+            update(ServerMod)
+            .where(ServerMod.server_id == server_id)
+            .values(is_enabled=False, enabled_mod_ids=[])
+        )
+        if rows:
+            stmt = sqlite_insert(ServerMod).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["server_id", "workshop_id"],
+                set_={
+                    "mod_ids": stmt.excluded.mod_ids,
+                    "enabled_mod_ids": stmt.excluded.enabled_mod_ids,
+                    "is_enabled": stmt.excluded.is_enabled,
+                    "updated_at": stmt.excluded.updated_at
+                }
+            )
+            await db.execute(stmt)
         await db.commit()
         
         sync_result["success"] = True
@@ -1493,45 +1768,55 @@ async def sync_mods_from_server(
         )
 
 
+async def _stream_workshop_page(client: httpx.AsyncClient, workshop_id: str, needle: bytes) -> str:
+    """Stream a workshop page and stop downloading once the wanted marker
+    (plus a safety margin for the regex to match) has arrived, instead of
+    buffering hundreds of KB of HTML per fetch."""
+    buf = bytearray()
+    async with client.stream(
+        'GET',
+        f"https://steamcommunity.com/sharedfiles/filedetails/?id={workshop_id}",
+        follow_redirects=True
+    ) as response:
+        async for chunk in response.aiter_bytes():
+            buf += chunk
+            idx = buf.find(needle)
+            if idx != -1 and len(buf) - idx > 1024:
+                break
+    return buf.decode('utf-8', 'ignore')
+
+
 async def fetch_mod_name_from_steam(client: httpx.AsyncClient, workshop_id: str) -> str | None:
     """Fetch mod name from Steam Workshop page"""
     try:
-        response = await client.get(
-            f"https://steamcommunity.com/sharedfiles/filedetails/?id={workshop_id}",
-            follow_redirects=True
-        )
-        html = response.text
-        name_match = re.search(r'<div class="workshopItemTitle">([^<]+)</div>', html)
+        html = await _stream_workshop_page(client, workshop_id, b'workshopItemTitle')
+        name_match = _RE_STEAM_NAME.search(html)
         return name_match.group(1).strip() if name_match else None
-    except:
+    except httpx.HTTPError:
         return None
 
 
 async def fetch_mod_id_from_steam(client: httpx.AsyncClient, workshop_id: str) -> str | None:
     """Fetch ModId from Steam Workshop page description"""
     try:
-        response = await client.get(
-            f"https://steamcommunity.com/sharedfiles/filedetails/?id={workshop_id}",
-            follow_redirects=True
-        )
-        html = response.text
+        html = await _stream_workshop_page(client, workshop_id, b'Mod ID:')
         # Look for "Mod ID: <b>xxx</b>" pattern first
-        mod_id_match = re.search(r'Mod\s*ID:\s*<b>([A-Za-z0-9_-]+)</b>', html, re.IGNORECASE)
+        mod_id_match = _RE_STEAM_MODID_BOLD.search(html)
         if mod_id_match:
             return mod_id_match.group(1).strip()
         # Fallback to plain text pattern
-        mod_id_match = re.search(r'Mod\s*ID:\s*([A-Za-z0-9_-]+)', html, re.IGNORECASE)
+        mod_id_match = _RE_STEAM_MODID.search(html)
         return mod_id_match.group(1).strip() if mod_id_match else None
-    except:
+    except httpx.HTTPError:
         return None
 
 
 @app.get("/servers/{server_id}/commands", response_model=List[dict])
 async def get_command_history(
     server_id: int,
+    current_user: CurrentUser,
     limit: int = 50,
-    db: AsyncSession = Depends(get_db),
-    current_user: str = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db_ro)
 ):
     """Get command execution history for server"""
     result = await db.execute(
@@ -1557,19 +1842,32 @@ async def get_command_history(
 
 # ============= Server State =============
 
+# Column projection mirroring ServerStateResponse - the dashboard polls these
+# endpoints, so rows go straight from SQLite to orjson without ORM object
+# construction or pydantic validation, and the bulky raw_data column is
+# never fetched
+_STATE_COLUMNS = (
+    ServerState.id, ServerState.server_id, ServerState.server_name,
+    ServerState.version, ServerState.players_online, ServerState.max_players,
+    ServerState.cpu_usage, ServerState.memory_usage, ServerState.uptime,
+    ServerState.timestamp,
+)
+_STATE_FIELDS = tuple(c.key for c in _STATE_COLUMNS)
+
+
 @app.get("/servers/{server_id}/state/latest", response_model=ServerStateResponse)
 async def get_latest_server_state(
     server_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db_ro)
 ):
     """Get latest server state snapshot"""
     result = await db.execute(
-        select(ServerState)
+        select(*_STATE_COLUMNS)
         .where(ServerState.server_id == server_id)
         .order_by(ServerState.timestamp.desc())
         .limit(1)
     )
-    state = result.scalar_one_or_none()
+    state = result.first()
     
     if not state:
         raise HTTPException(
@@ -1577,45 +1875,56 @@ async def get_latest_server_state(
             detail=f"No state data found for server {server_id}"
         )
     
-    return state
+    return ORJSONResponse(dict(zip(_STATE_FIELDS, state)))
 
 
 @app.get("/servers/{server_id}/state/history", response_model=List[ServerStateResponse])
 async def get_server_state_history(
     server_id: int,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db_ro)
 ):
     """Get server state history"""
     result = await db.execute(
-        select(ServerState)
+        select(*_STATE_COLUMNS)
         .where(ServerState.server_id == server_id)
         .order_by(ServerState.timestamp.desc())
         .limit(limit)
     )
-    states = result.scalars().all()
     
-    return states
+    return ORJSONResponse([dict(zip(_STATE_FIELDS, row)) for row in result.all()])
 
 
 # ============= Static Files (React SPA) =============
 
+# The static build cannot change while the server runs - stat it once at
+# import instead of twice per request on the SPA hot path
+_STATIC_DIR_EXISTS = STATIC_DIR.exists()
+_INDEX_PATH = STATIC_DIR / "index.html"
+_INDEX_EXISTS = _INDEX_PATH.exists()
+
+
 @app.get("/{full_path:path}")
 async def serve_spa(full_path: str):
     """Serve React SPA for all non-API routes"""
-    # Check if static directory exists
-    if not STATIC_DIR.exists():
+    if not _STATIC_DIR_EXISTS:
         return {"error": "Static files not found. Run in development mode or build frontend."}
     
-    # Try to serve the requested file
-    file_path = STATIC_DIR / full_path
-    if file_path.exists() and file_path.is_file():
-        return FileResponse(file_path)
+    # Reject path traversal before touching the filesystem; an absolute
+    # path would make STATIC_DIR / full_path discard the base entirely
+    if '..' in full_path or full_path.startswith(('/', '\\')):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid path")
+    
+    # Try to serve the requested file - is_file() alone covers the old
+    # exists() + is_file() pair with a single stat
+    if full_path:
+        file_path = STATIC_DIR / full_path
+        if file_path.is_file():
+            return FileResponse(file_path)
     
     # Fallback to index.html for SPA routing
-    index_path = STATIC_DIR / "index.html"
-    if index_path.exists():
-        return FileResponse(index_path)
+    if _INDEX_EXISTS:
+        return FileResponse(_INDEX_PATH)
     
     return {"error": "index.html not found"}
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, JSON, Index
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -86,14 +86,20 @@ class Player(Base):
 class ServerMod(Base):
     """Mod configuration for a server"""
     __tablename__ = "server_mods"
+
+    # (server_id, workshop_id) is the business key - every lookup in the mod
+    # endpoints filters on both, and sync/import rely on one row per pair
+    __table_args__ = (
+        Index("ix_server_mods_server_workshop", "server_id", "workshop_id", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     server_id = Column(Integer, nullable=False, index=True)
     
     # Mod identification
     workshop_id = Column(String(50), nullable=False)
-    mod_ids = Column(Text, nullable=False)  # All mod IDs separated by ;
-    enabled_mod_ids = Column(Text, nullable=True)  # Enabled mod IDs separated by ;
+    mod_ids = Column(JSON, nullable=False, default=list)  # All mod IDs
+    enabled_mod_ids = Column(JSON, nullable=True, default=list)  # Enabled mod IDs
     name = Column(String(500), nullable=True)
     
     # Status
@@ -2,17 +2,34 @@ import struct
 import socket
 import asyncio
 import logging
+import random
+from functools import lru_cache
 from typing import Optional
 from app.config import settings
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
+# Setup logging (level/handlers are the application's call, not this module's)
 logger = logging.getLogger("rcon")
 
 # Reduce noise from other loggers
 logging.getLogger("aiosqlite").setLevel(logging.WARNING)
 logging.getLogger("sqlalchemy").setLevel(logging.WARNING)
 
+# Precompiled packet layouts: size + id + type header, and the individual
+# little-endian int32 pieces read separately off the stream
+_HDR = struct.Struct('<iii')
+_INT32 = struct.Struct('<i')
+_ID_TYPE = struct.Struct('<ii')
+
+
+@lru_cache(maxsize=128)
+def _encode_body(body: str) -> bytes:
+    """Encode a packet body with its double NUL terminator.
+
+    The same handful of strings (showoptions, players, the auth password)
+    make up nearly all traffic, so the encoded bytes are cached.
+    """
+    return body.encode('utf-8') + b'\x00\x00'
+
 
 class RCONError(Exception):
     """Base exception for RCON errors"""
@@ -34,186 +51,245 @@ class RCONClient:
     RCON client for Project Zomboid server communication
     Based on Source RCON Protocol
     """
-    
+
     # Packet types
     SERVERDATA_AUTH = 3
     SERVERDATA_AUTH_RESPONSE = 2
     SERVERDATA_EXECCOMMAND = 2
     SERVERDATA_RESPONSE_VALUE = 0
-    
+
     def __init__(self, host: str, port: int, password: str, timeout: int = None):
         self.host = host
         self.port = port
         self.password = password
         self.timeout = timeout or settings.rcon_timeout
-        
-        self._socket: Optional[socket.socket] = None
+
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
         self._request_id = 0
         self._connected = False
         self._authenticated = False
-        
-        logger.info(f"RCONClient initialized for {host}:{port}")
-    
+
+        logger.debug("RCONClient initialized for %s:%d", host, port)
+
     def _get_next_id(self) -> int:
         """Generate next request ID"""
         self._request_id += 1
         return self._request_id
-    
-    def _pack_packet(self, packet_id: int, packet_type: int, body: str) -> bytes:
-        """Pack data into RCON packet format"""
-        body_bytes = body.encode('utf-8') + b'\x00\x00'
+
+    def _pack_packet(self, packet_id: int, packet_type: int, body: str) -> bytearray:
+        """Pack data into RCON packet format.
+
+        Built in a single preallocated bytearray; StreamWriter.write takes
+        any buffer object, so no bytes copy is made on the way out.
+        """
+        body_bytes = _encode_body(body)
         size = len(body_bytes) + 8  # 4 bytes for ID + 4 bytes for type
-        
-        packet = struct.pack('<i', size) + \
-               struct.pack('<i', packet_id) + \
-               struct.pack('<i', packet_type) + \
-               body_bytes
-        
-        logger.debug(f"Packed packet: id={packet_id}, type={packet_type}, body='{body[:50]}...', size={size}")
-        logger.debug(f"Raw packet hex: {packet.hex()}")
+
+        packet = bytearray(12 + len(body_bytes))
+        _HDR.pack_into(packet, 0, size, packet_id, packet_type)
+        packet[12:] = body_bytes
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Packed packet: id=%d, type=%d, body='%.50s...', size=%d",
+                         packet_id, packet_type, body, size)
+            logger.debug("Raw packet hex: %s", packet.hex())
         return packet
-    
-    def _unpack_packet(self, data: bytes) -> tuple[int, int, str]:
-        """Unpack RCON packet"""
-        logger.debug(f"Unpacking {len(data)} bytes: {data[:100].hex()}...")
-        
-        if len(data) < 4:
-            logger.warning(f"Packet too short: {len(data)} bytes")
-            return 0, 0, ""
-        
-        size = struct.unpack('<i', data[0:4])[0]
-        logger.debug(f"Packet size from header: {size}")
-        
-        if len(data) < 12:
-            logger.warning(f"Packet incomplete: have {len(data)}, need at least 12")
-            return 0, 0, ""
-        
-        packet_id = struct.unpack('<i', data[4:8])[0]
-        packet_type = struct.unpack('<i', data[8:12])[0]
-        
-        # Body might be empty
-        if size > 8:
-            body = data[12:12+size-8].decode('utf-8', errors='ignore').rstrip('\x00')
-        else:
-            body = ""
-        
-        logger.debug(f"Unpacked: id={packet_id}, type={packet_type}, body='{body[:100]}'")
+
+    def _unpack_packet(self, payload: "bytes | bytearray | memoryview") -> tuple[int, int, memoryview]:
+        """Unpack RCON packet payload (everything after the size prefix).
+
+        The body comes back as a memoryview over the raw bytes, NUL
+        terminators stripped; decoding is deferred to the caller so a
+        multi-packet response is decoded once, not per fragment.
+        """
+        view = memoryview(payload)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Unpacking %d byte payload: %s...", len(view), view[:100].hex())
+
+        if len(view) < 8:
+            logger.warning("Payload too short: %d bytes", len(view))
+            return 0, 0, memoryview(b"")
+
+        packet_id, packet_type = _ID_TYPE.unpack_from(view)
+
+        # Body might be empty; drop the trailing NUL terminators in place
+        body = view[8:]
+        end = len(body)
+        while end and body[end - 1] == 0:
+            end -= 1
+        body = body[:end]
+
+        logger.debug("Unpacked: id=%d, type=%d, %d byte body", packet_id, packet_type, len(body))
         return packet_id, packet_type, body
-    
-    def connect(self) -> None:
+
+    async def _read_packet(self) -> tuple[int, int, memoryview]:
+        """Read exactly one length-prefixed packet off the stream"""
+        size_bytes = await self._reader.readexactly(4)
+        size = _INT32.unpack(size_bytes)[0]
+        payload = await self._reader.readexactly(size)
+        return self._unpack_packet(payload)
+
+    def _tune_socket(self) -> None:
+        """Apply TCP options for a long-lived, latency-sensitive connection"""
+        sock = self._writer.get_extra_info('socket')
+        if sock is None:
+            return
+        # Small request/response packets: send them immediately, and let
+        # keepalive probes surface a silently dead server between commands
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        if hasattr(socket, 'TCP_KEEPIDLE'):  # Linux keepalive tuning
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 30)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 10)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3)
+
+    async def connect(self) -> None:
         """Establish connection to RCON server"""
         logger.info(f"Connecting to {self.host}:{self.port}...")
         try:
-            self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self._socket.settimeout(self.timeout)
-            self._socket.connect((self.host, self.port))
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port),
+                timeout=self.timeout
+            )
+            self._tune_socket()
             self._connected = True
             logger.info(f"Connected successfully to {self.host}:{self.port}")
-        except socket.error as e:
+        except (OSError, asyncio.TimeoutError) as e:
             logger.error(f"Connection failed: {e}")
             raise RCONConnectionError(f"Failed to connect to {self.host}:{self.port}: {e}")
-    
-    def authenticate(self) -> None:
-        """Authenticate with RCON server"""
+
+    def _queue_command(self, command: str) -> int:
+        """Buffer a command packet plus its end-of-response sentinel.
+
+        The empty RESPONSE_VALUE sentinel works because the server answers
+        requests in order: its (empty) reply to the sentinel marks the end
+        of the real response, so reads stop immediately instead of waiting
+        out a fixed timeout after every command. Returns the sentinel id;
+        the caller drains the writer.
+        """
+        request_id = self._get_next_id()
+        self._writer.write(self._pack_packet(request_id, self.SERVERDATA_EXECCOMMAND, command))
+        sentinel_id = self._get_next_id()
+        self._writer.write(self._pack_packet(sentinel_id, self.SERVERDATA_RESPONSE_VALUE, ""))
+        return sentinel_id
+
+    async def _read_response(self, sentinel_id: int) -> str:
+        """Collect response packets until the sentinel comes back.
+
+        Fragments are accumulated as raw bytes and decoded in one pass at
+        the end rather than str-decoded packet by packet.
+        """
+        fragments = []
+        dbg = logger.isEnabledFor(logging.DEBUG)
+
+        while True:
+            try:
+                response_id, response_type, body = await asyncio.wait_for(
+                    self._read_packet(), timeout=self.timeout
+                )
+            except asyncio.TimeoutError:
+                # Server never echoed the sentinel; keep what arrived
+                if dbg:
+                    logger.debug("Read timeout, no more data")
+                break
+
+            if response_id == sentinel_id:
+                if dbg:
+                    logger.debug("Sentinel echoed, response complete")
+                break
+
+            if dbg:
+                logger.debug("Got %d byte fragment", len(body))
+
+            if len(body):
+                fragments.append(body)
+
+        if not fragments:
+            return "(команда виконана без відповіді)"
+        return b'\n'.join(fragments).decode('utf-8', errors='ignore')
+
+    async def authenticate(self, login_command: str = None) -> None:
+        """Authenticate with RCON server.
+
+        If login_command is given (PZ requires a login command after AUTH),
+        it is pipelined behind the AUTH packet in the same write, saving a
+        round trip on every connect.
+        """
         if not self._connected:
             raise RCONError("Not connected")
-        
+
         logger.info("Authenticating...")
         request_id = self._get_next_id()
         packet = self._pack_packet(request_id, self.SERVERDATA_AUTH, self.password)
-        
+
         try:
-            self._socket.send(packet)
-            logger.debug(f"Sent auth packet, waiting for response...")
-            
-            # Read response
-            response_data = self._socket.recv(4096)
-            logger.debug(f"Received {len(response_data)} bytes")
-            
-            response_id, response_type, _ = self._unpack_packet(response_data)
-            
+            self._writer.write(packet)
+            sentinel_id = self._queue_command(login_command) if login_command else None
+            await self._writer.drain()
+            logger.debug("Sent auth packet, waiting for response...")
+
+            # Source servers may mirror the auth request with an empty
+            # RESPONSE_VALUE packet first; skip frames until the actual
+            # AUTH_RESPONSE arrives instead of judging the first packet
+            while True:
+                response_id, response_type, _ = await asyncio.wait_for(
+                    self._read_packet(), timeout=self.timeout
+                )
+                if response_type == self.SERVERDATA_AUTH_RESPONSE:
+                    break
+
             # Check for auth failure (ID = -1)
             if response_id == -1:
                 logger.error("Authentication failed: invalid password")
                 raise RCONAuthError("Authentication failed: invalid password")
-            
+
             self._authenticated = True
             logger.info("Authentication successful")
-            
-        except socket.error as e:
+
+            if sentinel_id is not None:
+                login_result = await self._read_response(sentinel_id)
+                logger.info(f"Login result: {login_result}")
+
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError) as e:
             logger.error(f"Authentication error: {e}")
             raise RCONConnectionError(f"Authentication error: {e}")
-    
-    def execute(self, command: str) -> str:
+
+    async def execute(self, command: str) -> str:
         """Execute command on RCON server"""
         if not self._authenticated:
             raise RCONError("Not authenticated")
-        
+
         logger.info(f"Executing command: '{command}'")
-        request_id = self._get_next_id()
-        packet = self._pack_packet(request_id, self.SERVERDATA_EXECCOMMAND, command)
-        
+
         try:
-            self._socket.send(packet)
-            logger.debug(f"Sent command packet")
-            
-            # Read response - may come in multiple packets
-            response_parts = []
-            self._socket.settimeout(2)  # Short timeout for reading responses
-            
-            while True:
-                try:
-                    response_data = self._socket.recv(4096)
-                    logger.debug(f"Received {len(response_data)} bytes")
-                    
-                    if not response_data:
-                        logger.debug("Empty response, breaking")
-                        break
-                    
-                    _, response_type, body = self._unpack_packet(response_data)
-                    logger.debug(f"Parsed body: '{body[:200] if body else '(empty)'}'")
-                    
-                    if body:
-                        response_parts.append(body)
-                        
-                except socket.timeout:
-                    logger.debug("Socket timeout, no more data")
-                    break
-            
-            # Restore original timeout
-            self._socket.settimeout(self.timeout)
-            
-            result = '\n'.join(response_parts) if response_parts else "(команда виконана без відповіді)"
+            sentinel_id = self._queue_command(command)
+            await self._writer.drain()
+            logger.debug("Sent command packet")
+
+            result = await self._read_response(sentinel_id)
             logger.info(f"Command result: '{result[:200]}...'")
             return result
-            
-        except socket.error as e:
+
+        except (OSError, asyncio.IncompleteReadError) as e:
             logger.error(f"Command execution error: {e}")
             self._connected = False
             self._authenticated = False
             raise RCONConnectionError(f"Command execution error: {e}")
-    
+
     def disconnect(self) -> None:
         """Close connection"""
-        if self._socket:
+        if self._writer:
             try:
-                self._socket.close()
-            except:
+                self._writer.close()
+            except Exception:
                 pass
             finally:
-                self._socket = None
+                self._reader = None
+                self._writer = None
                 self._connected = False
                 self._authenticated = False
-    
-    def __enter__(self):
-        """Context manager entry"""
-        self.connect()
-        self.authenticate()
-        return self
-    
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        """Context manager exit"""
-        self.disconnect()
 
 
 class RCONManager:
@@ -221,53 +297,91 @@ class RCONManager:
     Manager for persistent RCON connections
     Handles reconnection and connection pooling
     """
-    
+
     def __init__(self):
         self._connections: dict[int, RCONClient] = {}
         self._active_tasks: dict[int, asyncio.Task] = {}
-    
+        # One lock per server: a client carries a single request/response
+        # stream, so concurrent commands must not interleave on it
+        self._locks: dict[int, asyncio.Lock] = {}
+        # Reconnect backoff per server: doubles on failure, cleared on success
+        self._backoff: dict[int, float] = {}
+
+    def _lock_for(self, server_id: int) -> asyncio.Lock:
+        lock = self._locks.get(server_id)
+        if lock is None:
+            lock = self._locks.setdefault(server_id, asyncio.Lock())
+        return lock
+
     async def connect(self, server_id: int, host: str, port: int, password: str, username: str = None) -> None:
         """Establish and maintain connection to server"""
-        client = RCONClient(host, port, password)
-        
-        try:
-            client.connect()
-            client.authenticate()
-            self._connections[server_id] = client
-            
-            # PZ RCON requires login command after AUTH
-            if username:
-                logger.info(f"Performing PZ login with username: {username}")
-                login_result = client.execute(f"login {username} {password}")
-                logger.info(f"Login result: {login_result}")
-            
-        except (RCONConnectionError, RCONAuthError) as e:
-            raise RCONError(f"Failed to connect to server {server_id}: {e}")
-    
+        async with self._lock_for(server_id):
+            # Reuse the existing client object on reconnect unless the
+            # connection details changed; connect() opens fresh streams either
+            # way, this just skips re-allocating the client per attempt. The
+            # old client is always disconnected first so a host/credential
+            # change cannot orphan its live TCP stream.
+            client = self._connections.get(server_id)
+            if client is not None:
+                client.disconnect()
+            if client is None or (client.host, client.port, client.password) != (host, port, password):
+                client = RCONClient(host, port, password)
+
+            # Back off after failed attempts so a dead server is not hammered;
+            # jitter keeps several reconnecting servers from retrying in sync
+            delay = self._backoff.get(server_id, 0.0)
+            if delay:
+                await asyncio.sleep(delay * (0.5 + random.random() / 2))
+
+            try:
+                await client.connect()
+
+                # PZ RCON requires login command after AUTH; it rides along
+                # in the auth write
+                if username:
+                    logger.info(f"Performing PZ login with username: {username}")
+                await client.authenticate(
+                    f"login {username} {password}" if username else None
+                )
+
+                self._connections[server_id] = client
+                self._backoff.pop(server_id, None)
+
+            except (RCONConnectionError, RCONAuthError) as e:
+                client.disconnect()
+                self._connections.pop(server_id, None)
+                self._backoff[server_id] = min(delay * 2, 5.0) if delay else 0.2
+                raise RCONError(f"Failed to connect to server {server_id}: {e}")
+
     def disconnect(self, server_id: int) -> None:
         """Disconnect from server"""
         if server_id in self._connections:
             self._connections[server_id].disconnect()
             del self._connections[server_id]
-    
-    def execute_command(self, server_id: int, command: str) -> str:
+
+    async def execute_command(self, server_id: int, command: str) -> str:
         """Execute command on connected server"""
         if server_id not in self._connections:
             raise RCONError(f"Not connected to server {server_id}")
-        
-        client = self._connections[server_id]
-        
-        try:
-            return client.execute(command)
-        except RCONConnectionError:
-            # Connection lost, remove from pool
-            self.disconnect(server_id)
-            raise
-    
+
+        async with self._lock_for(server_id):
+            # Re-check under the lock: a queued caller may have seen the
+            # connection torn down while waiting
+            client = self._connections.get(server_id)
+            if client is None:
+                raise RCONError(f"Not connected to server {server_id}")
+
+            try:
+                return await client.execute(command)
+            except RCONConnectionError:
+                # Connection lost, remove from pool
+                self.disconnect(server_id)
+                raise
+
     def is_connected(self, server_id: int) -> bool:
         """Check if connected to server"""
         return server_id in self._connections and self._connections[server_id]._authenticated
-    
+
     def disconnect_all(self) -> None:
         """Disconnect all servers"""
         for server_id in list(self._connections.keys()):
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
 from datetime import datetime
 
@@ -36,9 +36,8 @@ class ServerResponse(BaseModel):
     auto_sync_mods: bool = False
     created_at: datetime
     updated_at: datetime
-    
-    class Config:
-        from_attributes = True
+
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Command schemas
@@ -64,9 +63,8 @@ class ServerStateResponse(BaseModel):
     memory_usage: Optional[str]
     uptime: Optional[str]
     timestamp: datetime
-    
-    class Config:
-        from_attributes = True
+
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Connection schemas
@@ -103,9 +101,8 @@ class ModResponse(BaseModel):
     workshop_url: Optional[str]
     created_at: datetime
     updated_at: datetime
-    
-    class Config:
-        from_attributes = True
+
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ModParseRequest(BaseModel):